@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Adaptive AVIF encoding policy used by downloader.py.
+
+Instead of one fixed quality/speed for every submission, each image is:
+1. downscaled so its longest edge is at most `max_dimension` pixels,
+2. encoded at a speed picked from its pixel count, nudged faster when the
+   run's encode time budget is running out,
+3. optionally binary-searched on quality to land under `target_bytes`.
+
+Decoding is bounded too: JPEGs are decoded at a reduced DCT scale (draft),
+JPEG 2000 at a reduced resolution level, PDFs are rendered straight at the
+target size, and anything whose decoded buffer would still exceed
+`max_decode_megabytes` is rejected with ImageTooLarge before it is loaded.
+
+Settings come from the `avif:` block of config.yaml; see DEFAULTS.
+"""
+
+import hashlib
+import io
+import json
+import os
+import time
+
+from PIL import Image
+
+import metrics
+
+
+DEFAULTS = {
+    'max_dimension': 3840,        # longest edge in px after downscaling; 0/None keeps the original size
+    'quality': 80,                # starting (and maximum) quality
+    'min_quality': 45,            # lower bound for the target_bytes search
+    'target_bytes': None,         # e.g. 600000 to keep every AVIF under ~600 KB
+    'min_speed': 6,               # speed for small images and floor for all; lower only by explicit choice (several times slower)
+    'max_speed': 9,               # fastest speed the budget logic may escalate to
+    'time_budget_seconds': None,  # total encode time for the run; None disables budgeting
+    'max_decode_megabytes': 512,  # cap on one submission's decoded pixel buffer; larger files fail
+    'pdf_dpi': 72,                # PDF render resolution, before the max_dimension cap
+}
+
+# Images up to this many megapixels encode at min_speed; larger ones use the
+# base speeds below (pixel-count threshold in megapixels, speed), else 8.
+SMALL_IMAGE_MEGAPIXELS = 2
+SPEED_BY_MEGAPIXELS = ((8, 6), (16, 7))
+# libaom encode time per speed relative to speed 6, measured on 1.9 and 6 MP
+# photos at quality 80. Speeds 4-5 cost ~6x speed 6 for <1% smaller files.
+# Speeds outside the table use the nearest measured one.
+SPEED_COST = {4: 6.6, 5: 6.2, 6: 1.0, 7: 0.6, 8: 0.28, 9: 0.2}
+# Bisection steps for target_bytes; ~6 steps resolve quality to within 1.
+MAX_QUALITY_STEPS = 6
+# Settings that change what an encode looks like (speed only trades time for a few bytes).
+OUTPUT_SETTINGS = ('max_dimension', 'quality', 'min_quality', 'target_bytes', 'pdf_dpi')
+
+
+class ImageTooLarge(Exception):
+    """Raised when decoding a submission would exceed max_decode_megabytes."""
+
+
+class AvifPolicy:
+    def __init__(self, **settings):
+        unknown = set(settings) - set(DEFAULTS)
+        if unknown:
+            raise ValueError(f"Unknown avif setting(s): {', '.join(sorted(unknown))}")
+        self.settings = {**DEFAULTS, **{k: v for k, v in settings.items() if v is not None}}
+        self.remaining = None          # submissions still to process this run, if known
+        self.spent = 0.0               # encode seconds used so far
+        self.seconds_per_mp = None     # observed cost at speed 6, EWMA
+
+    @classmethod
+    def from_config(cls, config):
+        """Build a policy from a parsed config.yaml dict (its optional `avif:` block)."""
+        return cls(**((config or {}).get('avif') or {}))
+
+    def output_key(self):
+        """Short fingerprint of the output-affecting settings, used to key cached encodes."""
+        relevant = {k: self.settings[k] for k in OUTPUT_SETTINGS}
+        return hashlib.sha256(json.dumps(relevant, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+
+    def expect(self, count):
+        """Tell the policy how many submissions the run will process (enables budget pacing)."""
+        self.remaining = count
+
+    def submission_done(self):
+        """Count one processed submission, whether it was encoded, linked, cached or failed."""
+        if self.remaining:
+            self.remaining -= 1
+
+    # ---------------- bounded decoding ----------------
+    def target_size(self, size):
+        """Size that fits within max_dimension on the longest edge, keeping aspect ratio."""
+        limit = self.settings['max_dimension']
+        w, h = size
+        if not limit or max(w, h) <= limit:
+            return size
+        scale = limit / max(w, h)
+        return max(1, round(w * scale)), max(1, round(h * scale))
+
+    def check_decode_size(self, size, mode, label):
+        """Raise ImageTooLarge if a decoded size x mode buffer would exceed the cap."""
+        cap = self.settings['max_decode_megabytes']
+        if not cap:
+            return
+        # Pillow stores multi-band images (RGB included) as 4 bytes per pixel
+        bytes_per_pixel = 1 if mode in ('1', 'L', 'P') else 2 if mode.startswith('I;16') else 4
+        needed = size[0] * size[1] * bytes_per_pixel
+        if needed > cap * 1024 * 1024:
+            metrics.inc('images_too_large')
+            raise ImageTooLarge(f"{label} {size[0]}x{size[1]} {mode} needs ~{needed / 1048576:.0f} MB to decode (cap {cap} MB)")
+
+    def open_image(self, path):
+        """Open path for encoding, asking the decoder for a reduced size where the format allows."""
+        im = Image.open(path)
+        try:
+            original = decoded = im.size
+            target = self.target_size(im.size)
+            if target != im.size:
+                if im.format == 'JPEG':
+                    # DCT scaling: decodes at 1/2, 1/4 or 1/8 without building the full-size image
+                    im.draft(None, target)
+                    decoded = im.size
+                elif im.format == 'JPEG2000':
+                    scale = min(im.width // target[0], im.height // target[1])
+                    levels = scale.bit_length() - 1
+                    if levels > 0:
+                        im.reduce = levels
+                        decoded = (-(-im.width >> levels), -(-im.height >> levels))
+            if decoded != original:
+                metrics.inc('images_reduced_decode')
+            self.check_decode_size(decoded, im.mode, path)
+        except Exception:
+            im.close()
+            raise
+        return im
+
+    def pdf_zoom(self, width, height, label='PDF page'):
+        """Render zoom for a PDF page of width x height points, capped by max_dimension and memory."""
+        zoom = self.settings['pdf_dpi'] / 72
+        limit = self.settings['max_dimension']
+        if limit:
+            zoom = min(zoom, limit / max(width, height))
+        self.check_decode_size((round(width * zoom), round(height * zoom)), 'RGB', label)
+        return zoom
+
+    # ---------------- decisions ----------------
+    def downscale(self, im):
+        """Shrink im in place to max_dimension on its longest edge (no-op when already smaller)."""
+        limit = self.settings['max_dimension']
+        if not limit or max(im.size) <= limit:
+            return im
+        im.thumbnail((limit, limit), Image.Resampling.LANCZOS)
+        metrics.inc('images_downscaled')
+        return im
+
+    def pick_speed(self, megapixels):
+        s = self.settings
+        if megapixels <= SMALL_IMAGE_MEGAPIXELS:
+            speed = s['min_speed']
+        else:
+            speed = next((sp for limit, sp in SPEED_BY_MEGAPIXELS if megapixels <= limit), 8)
+        speed = max(s['min_speed'], min(speed, s['max_speed']))
+        budget = s['time_budget_seconds']
+        if budget and self.remaining and self.seconds_per_mp:
+            allowance = max(budget - self.spent, 0) / self.remaining
+            while speed < s['max_speed'] and self.predict(megapixels, speed) > allowance:
+                speed += 1
+        return speed
+
+    def predict(self, megapixels, speed):
+        return self.seconds_per_mp * megapixels * speed_cost(speed)
+
+    def record(self, megapixels, speed, seconds):
+        self.spent += seconds
+        if megapixels > 0:
+            normalized = seconds / megapixels / speed_cost(speed)
+            self.seconds_per_mp = normalized if self.seconds_per_mp is None else 0.7 * self.seconds_per_mp + 0.3 * normalized
+
+    # ---------------- encoding ----------------
+    def encode(self, im, avif_path):
+        """Downscale, pick settings and write im to avif_path. Returns (quality, speed)."""
+        im = self.downscale(im)
+        megapixels = im.width * im.height / 1e6
+        speed = self.pick_speed(megapixels)
+        start = time.perf_counter()
+        # Write beside the target and rename: never truncates a file that may be hardlinked elsewhere
+        tmp_path = avif_path + '.tmp'
+        if self.settings['target_bytes']:
+            quality, data = self.search_quality(im, speed)
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+        else:
+            quality = self.settings['quality']
+            im.save(tmp_path, format='AVIF', quality=quality, speed=speed)
+        os.replace(tmp_path, avif_path)
+        self.record(megapixels, speed, time.perf_counter() - start)
+        return quality, speed
+
+    def search_quality(self, im, speed):
+        """Return (quality, data) for the highest quality whose output fits target_bytes.
+
+        Tries the configured quality first (one encode in the common case), then
+        bisects down to min_quality, which is used as-is when nothing fits.
+        """
+        target = self.settings['target_bytes']
+        lo, hi = self.settings['min_quality'], self.settings['quality']
+        data = _encode_bytes(im, hi, speed)
+        if len(data) <= target:
+            return hi, data
+        best = None
+        hi -= 1
+        for _ in range(MAX_QUALITY_STEPS):
+            if lo > hi:
+                break
+            q = (lo + hi) // 2
+            data = _encode_bytes(im, q, speed)
+            if len(data) <= target:
+                best = (q, data)
+                lo = q + 1
+            else:
+                hi = q - 1
+        if best is None:
+            q = self.settings['min_quality']
+            best = (q, _encode_bytes(im, q, speed))
+        return best
+
+
+def speed_cost(speed):
+    """Relative encode time of speed versus speed 6 (SPEED_COST, clamped to the measured range)."""
+    return SPEED_COST[min(max(speed, min(SPEED_COST)), max(SPEED_COST))]
+
+
+def _encode_bytes(im, quality, speed):
+    buf = io.BytesIO()
+    im.save(buf, format='AVIF', quality=quality, speed=speed)
+    return buf.getvalue()
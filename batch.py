@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Build several contests (events) at once.
+
+Each event is a directory laid out like this repo: config.yaml plus data.csv
+(or a ready teams.yaml), and optionally its own templates/ and public/. Events
+are built in parallel worker processes, each into its own output root, and
+all of them share one content-addressed image cache (image_cache.py), so a
+photo that was already downloaded or encoded - by any event, in any run - is
+linked instead of being fetched and encoded again.
+
+    python batch.py events/gcc-2025 events/xyz-2025 --workers 4
+    python batch.py events.yaml
+
+events.yaml (relative paths are resolved from the manifest's directory):
+
+    cache_dir: .cache/images        # optional, default .cache/images
+    events:
+      - dir: events/gcc-2025
+        name: gcc-2025              # optional, default: directory name
+        output: builds/gcc-2025     # optional, default: <dir>/dist
+
+Per-event console output goes to <dir>/build.log. The run ends with an
+aggregate throughput summary, also written to metrics/batch.json.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import yaml
+
+import metrics
+
+ROOT = Path(__file__).resolve().parent
+DEFAULT_CACHE_DIR = '.cache/images'
+
+
+def load_events(sources, output_root=None):
+    """Resolve manifests and event directories into [{'name', 'dir', 'output'}, ...] plus a manifest cache_dir."""
+    events, cache_dir = [], None
+    for source in sources:
+        path = Path(source)
+        if path.is_dir():
+            entries, base = [{'dir': str(path)}], Path('.')
+        else:
+            with open(path, 'r', encoding='utf-8') as f:
+                manifest = yaml.safe_load(f) or {}
+            base = path.parent
+            entries = manifest.get('events') or []
+            if manifest.get('cache_dir') and cache_dir is None:
+                cache_dir = str((base / manifest['cache_dir']).resolve())
+        for entry in entries:
+            event_dir = (base / entry['dir']).resolve()
+            name = entry.get('name') or event_dir.name
+            if output_root:
+                output = Path(output_root).resolve() / name
+            elif entry.get('output'):
+                output = (base / entry['output']).resolve()
+            else:
+                output = event_dir / 'dist'
+            events.append({'name': name, 'dir': str(event_dir), 'output': str(output)})
+    names = [e['name'] for e in events]
+    duplicates = sorted({n for n in names if names.count(n) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate event name(s): {', '.join(duplicates)}")
+    return events, cache_dir
+
+
+def build_event(event, cache_dir=None, skip_download=False):
+    """Build one event inside a worker process. Returns a JSON-serialisable summary."""
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))  # the worker changes directory before importing pipeline modules
+    metrics.reset()
+    start = time.perf_counter()
+    result = {'name': event['name'], 'output': event['output'], 'ok': False}
+    try:
+        # One process per event at a time, so the per-event cwd is safe and keeps
+        # downloader's relative files (failed.txt, duplicates.csv) inside the event
+        os.chdir(event['dir'])
+        with open('build.log', 'w', encoding='utf-8') as log, contextlib.redirect_stdout(log):
+            with open('config.yaml', 'r', encoding='utf-8') as f:
+                config = yaml.safe_load(f) or {}
+
+            if os.path.exists('data.csv'):
+                from generate_teams import generate_teams_yaml
+                with metrics.timer('generate_teams'):
+                    generate_teams_yaml('data.csv', 'teams.yaml')
+                if not skip_download:
+                    import downloader
+                    from avif_policy import AvifPolicy
+                    from dedupe import Deduper
+                    from image_cache import ImageCache
+                    downloader.AVIF_POLICY = AvifPolicy.from_config(config)
+                    downloader.DEDUPER = Deduper.from_config(config)
+                    downloader.IMAGE_CACHE = (ImageCache.from_config(cache_dir, downloader.AVIF_POLICY.output_key(), config)
+                                              if cache_dir else None)
+                    image_dir = Path('public/image')
+                    if image_dir.exists():
+                        shutil.rmtree(image_dir)
+                    image_dir.mkdir(parents=True)
+                    with metrics.timer('organize'):
+                        downloader.organize_files_from_csv('data.csv', str(image_dir))
+
+            from generate_site import GalleryGenerator
+            templates = Path('templates') if Path('templates').is_dir() else ROOT / 'templates'
+            generator = GalleryGenerator('.', event['output'], templates)
+            with metrics.timer('generate_site'):
+                result['ok'] = bool(generator.generate_all())
+            if not result['ok']:
+                result['error'] = 'site generation failed (see build.log)'
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    result['seconds'] = time.perf_counter() - start
+    result['metrics'] = metrics.report(event['name'])
+    return result
+
+
+def summarize(results, wall_seconds):
+    """Aggregate counters across events into throughput figures."""
+    totals = {}
+    for r in results:
+        for name, value in r['metrics']['counters'].items():
+            totals[name] = totals.get(name, 0) + value
+    busy = sum(r['seconds'] for r in results)
+    files = totals.get('files_succeeded', 0) + totals.get('files_failed', 0)
+    hits, misses = totals.get('cache_encoded_hits', 0), totals.get('cache_encoded_misses', 0)
+    return {
+        'events': len(results),
+        'events_failed': sum(1 for r in results if not r['ok']),
+        'wall_seconds': round(wall_seconds, 3),
+        'event_seconds': round(busy, 3),
+        'parallel_speedup': round(busy / wall_seconds, 2) if wall_seconds else None,
+        'events_per_minute': round(len(results) / wall_seconds * 60, 2) if wall_seconds else None,
+        'teams': totals.get('teams_loaded', 0),
+        'teams_per_second': round(totals.get('teams_loaded', 0) / wall_seconds, 2) if wall_seconds else None,
+        'files': files,
+        'files_per_second': round(files / wall_seconds, 2) if wall_seconds else None,
+        'files_encoded': totals.get('files_encoded', 0),
+        'downloads_skipped': totals.get('downloads_skipped', 0),
+        'cache_hit_rate': round(hits / (hits + misses), 3) if hits + misses else None,
+        'mb_downloaded': round(totals.get('bytes_downloaded', 0) / 1048576, 2),
+        'counters': totals,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build several contests in parallel with a shared image cache.')
+    parser.add_argument('sources', nargs='+', help='event directories and/or events.yaml manifests')
+    parser.add_argument('--workers', '-j', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--cache-dir', default=None, help=f'shared image cache (default: manifest cache_dir or {DEFAULT_CACHE_DIR})')
+    parser.add_argument('--no-cache', action='store_true', help='build without the shared image cache')
+    parser.add_argument('--output-root', default=None, help='write each event to <output-root>/<name> instead')
+    parser.add_argument('--skip-download', action='store_true', help='use existing public/image, only rebuild YAML + site')
+    parser.add_argument('--report', type=Path, default=None, help='also write per-event results + summary JSON here')
+    args = parser.parse_args()
+
+    try:
+        events, manifest_cache = load_events(args.sources, args.output_root)
+    except (OSError, ValueError, KeyError, yaml.YAMLError) as e:
+        print(f"✗ Could not load events: {e}")
+        sys.exit(1)
+    if not events:
+        print("✗ No events given")
+        sys.exit(1)
+    cache_dir = None if args.no_cache else str(Path(args.cache_dir or manifest_cache or DEFAULT_CACHE_DIR).resolve())
+    workers = max(1, min(args.workers or os.cpu_count() or 1, len(events)))
+
+    print(f"🚀 Building {len(events)} event(s) with {workers} worker(s)" + (f", image cache {cache_dir}" if cache_dir else ''))
+    start = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(build_event, e, cache_dir, args.skip_download): e for e in events}
+        for future in as_completed(futures):
+            event = futures[future]
+            try:
+                r = future.result()
+            except Exception as e:  # worker crashed (e.g. killed)
+                r = {'name': event['name'], 'output': event['output'], 'ok': False, 'error': f"{type(e).__name__}: {e}",
+                     'seconds': 0.0, 'metrics': {'counters': {}, 'timings': {}}}
+            results.append(r)
+            c = r['metrics']['counters']
+            if r['ok']:
+                print(f"✓ {r['name']}: {r['seconds']:.1f}s, {c.get('teams_loaded', 0)} teams, "
+                      f"{c.get('files_encoded', 0)} encoded, {c.get('cache_encoded_hits', 0)} from cache -> {r['output']}")
+            else:
+                print(f"✗ {r['name']}: {r.get('error')} ({Path(event['dir']) / 'build.log'})")
+    wall = time.perf_counter() - start
+
+    summary = summarize(results, wall)
+    metrics.reset()
+    for name, value in summary['counters'].items():
+        metrics.inc(name, value)
+    for r in results:
+        metrics.observe('event_build', r['seconds'])
+    metrics.inc('events_built', summary['events'] - summary['events_failed'])
+    metrics.inc('events_failed', summary['events_failed'])
+
+    print("=" * 60)
+    print(f"📦 {summary['events']} event(s) in {summary['wall_seconds']}s "
+          f"({summary['events_per_minute']} events/min, {summary['parallel_speedup']}x parallel speedup)")
+    print(f"👥 {summary['teams']} teams ({summary['teams_per_second']}/s), "
+          f"🖼️ {summary['files']} files ({summary['files_per_second']}/s), {summary['files_encoded']} encoded, "
+          f"{summary['downloads_skipped']} downloads skipped")
+    if summary['cache_hit_rate'] is not None:
+        print(f"♻️ Encode cache hit rate {summary['cache_hit_rate'] * 100:.1f}%, {summary['mb_downloaded']} MB downloaded")
+    if summary['events_failed']:
+        print(f"✗ {summary['events_failed']} event(s) failed")
+    metrics.write_report('batch')
+    if args.report:
+        args.report.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump({'summary': summary, 'events': sorted(results, key=lambda r: r['name'])}, f, indent=2)
+        print(f"📁 Report: {args.report}")
+    sys.exit(1 if summary['events_failed'] else 0)
+
+
+if __name__ == '__main__':
+    main()
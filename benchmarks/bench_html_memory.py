@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Peak-memory benchmark for index.html generation.
+
+Compares the streamed writer (GalleryGenerator.generate_html) against the
+previous build-then-replace approach on synthetic galleries of growing size.
+Run from the repository root:  python benchmarks/bench_html_memory.py [N ...]
+"""
+
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fixtures import synthetic_teams  # noqa: E402
+from generate_site import GalleryGenerator  # noqa: E402
+
+
+def make_generator(n, output_dir):
+    gen = GalleryGenerator()
+    gen.templates_dir = ROOT / 'templates'
+    gen.output_dir = Path(output_dir)
+    gen.config = {'site_title': 'Benchmark', 'show_team_data': 'all', 'footer': {'text': 'bench'}}
+    gen.teams_data = synthetic_teams(n)
+    return gen
+
+
+def legacy_generate_html(gen):
+    """The pre-streaming approach: join every fragment, replace into the template, write."""
+    with open(gen.templates_dir / 'index.html', 'r', encoding='utf-8') as f:
+        content = f.read()
+    replacements = {'{{SITE_TITLE}}': gen.config['site_title'], '{{FOOTER_TEXT}}': '', '{{MONO_LINK}}': ''}
+    for k, v in zip(gen.RESULTS_PLACEHOLDERS, gen.build_results_fragments()):
+        replacements['{{' + k + '}}'] = v
+    for k, v in replacements.items():
+        content = content.replace(k, v)
+    with open(gen.output_dir / 'index.html', 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+def measure(fn):
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [1000, 10000, 50000]
+    print(f"{'teams':>8} {'output':>10} {'legacy peak':>12} {'streamed peak':>14}")
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            gen = make_generator(n, tmp)
+            legacy = measure(lambda: legacy_generate_html(gen))
+            streamed = measure(gen.generate_html)
+            size = (Path(tmp) / 'index.html').stat().st_size
+        print(f"{n:>8} {size / 1e6:>8.1f}MB {legacy / 1e6:>10.1f}MB {streamed / 1e6:>12.2f}MB")
+
+
+if __name__ == '__main__':
+    main()
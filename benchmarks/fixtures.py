@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Synthetic contest fixtures for the benchmarks.
+
+- write_data_csv: a data.csv with N teams and M extra-stat columns (value
+  cards plus grouped (1)/(2) pie/bar pairs), in the schema generate_teams.py reads.
+- synthetic_teams: the equivalent in-memory teams list for GalleryGenerator.
+- make_image_bytes / make_pdf_bytes: deterministic-size submissions to encode.
+- FakeDriveServer: a local HTTP server answering /uc?export=download&id=...
+  like Google Drive, including the download_warning confirm interstitial.
+"""
+
+import csv
+import io
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+FORMATS = ('jpeg', 'png', 'pdf', 'bin')
+
+
+def drive_url(file_id):
+    return f"https://drive.google.com/file/d/{file_id}/view?usp=sharing"
+
+
+def file_id_for(team_number):
+    return f"bench{team_number:06d}"
+
+
+def write_data_csv(path, n_teams, n_stats=4, seed=0):
+    """Write a data.csv with n_teams rows and n_stats extra-stat groups.
+
+    Stats cycle through a single value card, a grouped (1)/(2) pie and a
+    grouped (1)/(2) bar, so every generate_teams.py code path is exercised.
+    """
+    rng = random.Random(seed)
+    headers = ['Position', 'Team Number', 'Team Name', 'Submission Image', 'Final Round Public Voting Result(%)']
+    stat_cols = []
+    for s in range(n_stats):
+        kind = ('value', 'pie', 'bar')[s % 3]
+        title = f"Stat {s}(extra stat)"
+        if kind == 'value':
+            stat_cols.append((kind, [title]))
+        else:
+            stat_cols.append((kind, [f"{title}({kind})(1)", f"{title}({kind})(2)"]))
+        headers.extend(stat_cols[-1][1])
+
+    votes = [rng.random() for _ in range(n_teams)]
+    total = sum(votes) or 1
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(headers)
+        for i in range(1, n_teams + 1):
+            row = [i, f"Team {i}", f"Synthetic Team {i}", drive_url(file_id_for(i)), round(votes[i - 1] / total * 100, 2)]
+            for kind, cols in stat_cols:
+                if kind == 'value':
+                    row.append(n_teams if i == 1 else '')
+                elif i <= 8:
+                    row.extend([f"Label {i}", rng.randint(1, 50)])
+                else:
+                    row.extend(['', ''])
+            writer.writerow(row)
+    return path
+
+
+def synthetic_teams(n_teams):
+    """Team dicts shaped like teams.yaml entries, for driving GalleryGenerator directly."""
+    return [
+        {
+            'teamName': f'Synthetic Team {i}',
+            'team_number': str(i),
+            'images': [f'image/{i}/Photo.avif'],
+            'description': 'Submission.',
+            'rank': str(i),
+            'public_vote_percent': round((i * 7919) % 1000 / 10, 1),
+        }
+        for i in range(1, n_teams + 1)
+    ]
+
+
+def make_image_bytes(fmt, size=(1600, 1200), seed=0):
+    """Return a photo-like test image (gradients, shapes and noise) encoded as fmt ('jpeg' or 'png').
+
+    The shapes are placed by seed, so different seeds look like different
+    photos rather than near-duplicates of one another.
+    """
+    from PIL import Image, ImageDraw
+
+    gradient = Image.linear_gradient('L').resize(size)
+    noise = Image.effect_noise(size, 24 + seed % 40)
+    img = Image.merge('RGB', (gradient, gradient.transpose(Image.Transpose.ROTATE_180), noise))
+    rng = random.Random(seed)
+    draw = ImageDraw.Draw(img)
+    w, h = size
+    for _ in range(6):
+        x, y = rng.randrange(w), rng.randrange(h)
+        rx, ry = rng.randint(w // 16, w // 4), rng.randint(h // 16, h // 4)
+        draw.ellipse((x - rx, y - ry, x + rx, y + ry), fill=tuple(rng.randrange(256) for _ in range(3)))
+    buf = io.BytesIO()
+    if fmt == 'jpeg':
+        img.save(buf, format='JPEG', quality=90)
+    else:
+        img.save(buf, format='PNG')
+    return buf.getvalue()
+
+
+def make_pdf_bytes(label='Submission', width=612, height=792):
+    """Return a minimal one-page PDF with a filled rectangle (coloured by label) and a text label."""
+    rng = random.Random(label)
+    r, g, b = (rng.randint(10, 70) / 100 for _ in range(3))
+    content = (
+        f"{r} {g} {b} rg 36 36 {width - 72} {height - 72} re f "
+        f"BT /F1 36 Tf 72 {height // 2} Td ({label}) Tj ET"
+    ).encode('ascii')
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        (f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {width} {height}] "
+         f"/Resources << /Font << /F1 5 0 R >> >> /Contents 4 0 R >>").encode('ascii'),
+        b"<< /Length " + str(len(content)).encode('ascii') + b" >>\nstream\n" + content + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for n, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(f"{n} 0 obj\n".encode('ascii') + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode('ascii'))
+    for off in offsets:
+        out.write(f"{off:010d} 00000 n \n".encode('ascii'))
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode('ascii'))
+    return out.getvalue()
+
+
+CONTENT_TYPES = {
+    'jpeg': 'image/jpeg',
+    'png': 'image/png',
+    'pdf': 'application/pdf',
+    # Drive sometimes omits a useful type; the downloader then has to sniff the body.
+    'bin': 'application/octet-stream',
+}
+
+
+def build_drive_files(n_teams, size=(1600, 1200)):
+    """Map file id -> (bytes, content_type), cycling through FORMATS."""
+    files = {}
+    for i in range(1, n_teams + 1):
+        fmt = FORMATS[i % len(FORMATS)]
+        if fmt == 'pdf':
+            body = make_pdf_bytes(f"Team {i}")
+        else:
+            body = make_image_bytes('png' if fmt == 'bin' else fmt, size, seed=i)
+        files[file_id_for(i)] = (body, CONTENT_TYPES[fmt])
+    return files
+
+
+class FakeDriveServer:
+    """Serve `files` on 127.0.0.1 the way drive.google.com/uc does.
+
+    Every `interstitial_every`-th id first answers with the HTML virus-scan
+    warning page (containing download_warning and a confirm= link); the file
+    is only returned once the confirm token is sent. `latency` adds a fixed
+    per-request delay in seconds.
+    """
+
+    CONFIRM_TOKEN = 't0k3n'
+
+    def __init__(self, files, interstitial_every=5, latency=0.0):
+        self.files = files
+        self.interstitial_every = interstitial_every
+        self.latency = latency
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                query = parse_qs(urlparse(self.path).query)
+                file_id = (query.get('id') or [''])[0]
+                entry = server.files.get(file_id)
+                if entry is None:
+                    self.send_error(404)
+                    return
+                body, content_type = entry
+                needs_confirm = server.interstitial_every and int(file_id[-6:]) % server.interstitial_every == 0
+                if needs_confirm and query.get('confirm', [''])[0] != server.CONFIRM_TOKEN:
+                    page = (
+                        "<html><body>\n<p>Google Drive can't scan this file for viruses.</p>\n"
+                        f"<a id=\"download_warning\" href=\"/uc?export=download&confirm={server.CONFIRM_TOKEN}&id={file_id}\">Download anyway</a>\n"
+                        "</body></html>\n"
+                    ).encode('utf-8')
+                    self._send(page, 'text/html; charset=utf-8')
+                    return
+                self._send(body, content_type)
+
+            def _send(self, body, content_type):
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def download_url(self):
+        """Format string compatible with downloader.DRIVE_DOWNLOAD_URL."""
+        host, port = self.httpd.server_address
+        return f"http://{host}:{port}/uc?export=download&id={{}}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+HTTP load test for the static site server.
+
+Opens --concurrency keep-alive connections and requests the given paths in a
+loop for --duration seconds, then reports requests/sec, latency percentiles
+(p50/p95/p99), bytes received and errors.
+
+    python serve.py --quiet &
+    python benchmarks/loadtest.py http://localhost:8000 / /script.js /style.css
+    python benchmarks/loadtest.py http://localhost:8000 / --encoding br,gzip --revalidate
+
+With --revalidate each client replays the ETag it got back as If-None-Match,
+which is what returning browsers do (mostly 304s).
+"""
+
+import argparse
+import http.client
+import json
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    k = min(len(sorted_values) - 1, max(0, round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+def worker(host, port, paths, deadline, encoding, revalidate, out):
+    latencies, statuses, errors, received = [], {}, 0, 0
+    etags = {}
+    conn = http.client.HTTPConnection(host, port, timeout=10)
+    i = 0
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        headers = {}
+        if encoding:
+            headers['Accept-Encoding'] = encoding
+        if revalidate and path in etags:
+            headers['If-None-Match'] = etags[path]
+        start = time.perf_counter()
+        try:
+            conn.request('GET', path, headers=headers)
+            resp = conn.getresponse()
+            body = resp.read()
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=10)
+            continue
+        latencies.append(time.perf_counter() - start)
+        statuses[resp.status] = statuses.get(resp.status, 0) + 1
+        received += len(body)
+        if resp.getheader('ETag'):
+            etags[path] = resp.getheader('ETag')
+    conn.close()
+    out.append((latencies, statuses, errors, received))
+
+
+def run(base_url, paths, concurrency, duration, encoding=None, revalidate=False):
+    parts = urlsplit(base_url)
+    host, port = parts.hostname, parts.port or 80
+    prefix = parts.path.rstrip('/')
+    paths = [prefix + (p if p.startswith('/') else '/' + p) for p in paths]
+
+    results = []
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(target=worker, args=(host, port, paths, deadline, encoding, revalidate, results))
+        for _ in range(concurrency)
+    ]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(x for r in results for x in r[0])
+    statuses = {}
+    for r in results:
+        for code, n in r[1].items():
+            statuses[code] = statuses.get(code, 0) + n
+    ms = lambda v: None if v is None else round(v * 1000, 3)  # noqa: E731
+    return {
+        'url': base_url,
+        'paths': paths,
+        'concurrency': concurrency,
+        'duration_seconds': round(elapsed, 3),
+        'requests': len(latencies),
+        'requests_per_second': round(len(latencies) / elapsed, 1) if elapsed else 0,
+        'latency_ms': {
+            'p50': ms(percentile(latencies, 50)),
+            'p95': ms(percentile(latencies, 95)),
+            'p99': ms(percentile(latencies, 99)),
+            'max': ms(latencies[-1] if latencies else None),
+        },
+        'statuses': {str(k): v for k, v in sorted(statuses.items())},
+        'errors': sum(r[2] for r in results),
+        'bytes_received': sum(r[3] for r in results),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('url', help='server base URL, e.g. http://localhost:8000')
+    parser.add_argument('paths', nargs='*', default=['/'], help='paths to request round-robin (default: /)')
+    parser.add_argument('--concurrency', '-c', type=int, default=16)
+    parser.add_argument('--duration', '-d', type=float, default=10.0, help='seconds to run')
+    parser.add_argument('--encoding', default=None, help='Accept-Encoding to send, e.g. "br, gzip"')
+    parser.add_argument('--revalidate', action='store_true', help='send If-None-Match with the last ETag seen')
+    parser.add_argument('--json', action='store_true', help='print the result as JSON')
+    args = parser.parse_args()
+
+    result = run(args.url, args.paths, args.concurrency, args.duration, args.encoding, args.revalidate)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    lat = result['latency_ms']
+    print(f"🔁 {result['requests']} requests in {result['duration_seconds']}s over {args.concurrency} connections")
+    print(f"⚡ {result['requests_per_second']} req/s")
+    print(f"⏱️ p50 {lat['p50']} ms, p95 {lat['p95']} ms, p99 {lat['p99']} ms, max {lat['max']} ms")
+    print(f"📦 {result['bytes_received'] / 1048576:.1f} MB received, statuses {result['statuses']}, errors {result['errors']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+End-to-end pipeline benchmark on synthetic contests.
+
+For each scale (number of teams) this builds a throwaway working directory
+with a synthetic data.csv, then times:
+  1. generate_teams_yaml            (CSV -> teams.yaml)
+  2. organize_files_from_csv        (download from a local fake Drive + AVIF encode)
+  3. GalleryGenerator.generate_all  (teams.yaml -> dist/)
+
+Results (timings plus the metrics.py counters of each stage) are saved as
+JSON so two runs can be compared:
+
+    python benchmarks/run.py --scales 10 100 1000
+    python benchmarks/run.py --scales 10 100 --compare benchmarks/results/<baseline>.json
+
+The download stage needs the full pixi environment (Pillow, pillow-avif,
+PyMuPDF, requests); it is skipped with a note when those are missing or
+when --skip-download is given.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import metrics  # noqa: E402
+from fixtures import FakeDriveServer, build_drive_files, write_data_csv  # noqa: E402
+from generate_site import GalleryGenerator  # noqa: E402
+from generate_teams import generate_teams_yaml  # noqa: E402
+
+RESULTS_DIR = ROOT / 'benchmarks' / 'results'
+
+
+def git_revision():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True)
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def timed(fn, *args, quiet=True, **kwargs):
+    """Run fn, returning (seconds, metrics report) with its console output suppressed."""
+    metrics.reset()
+    sink = io.StringIO() if quiet else None
+    with contextlib.redirect_stdout(sink) if quiet else contextlib.nullcontext():
+        start = time.perf_counter()
+        fn(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+    report = metrics.report(fn.__name__)
+    return elapsed, {'counters': report['counters'], 'timings': {k: v['sum_seconds'] for k, v in report['timings'].items()}}
+
+
+def load_downloader():
+    try:
+        import downloader
+        return downloader
+    except ImportError as e:
+        return e
+
+
+def bench_scale(n_teams, n_stats, image_size, skip_download, latency, verbose):
+    result = {'teams': n_teams}
+    workdir = Path(tempfile.mkdtemp(prefix=f'mono-bench-{n_teams}-'))
+    cwd = os.getcwd()
+    try:
+        os.chdir(workdir)
+        shutil.copy(ROOT / 'config.yaml', 'config.yaml')
+        write_data_csv('data.csv', n_teams, n_stats)
+
+        secs, m = timed(generate_teams_yaml, 'data.csv', 'teams.yaml', quiet=not verbose)
+        result['generate_teams_yaml'] = {'seconds': secs, **m}
+
+        downloader = None if skip_download else load_downloader()
+        if isinstance(downloader, ImportError):
+            result['organize_files_from_csv'] = {'skipped': f'missing dependency: {downloader.name}'}
+        elif downloader is None:
+            result['organize_files_from_csv'] = {'skipped': '--skip-download'}
+        else:
+            files = build_drive_files(n_teams, image_size)
+            with FakeDriveServer(files, latency=latency) as server:
+                downloader.DRIVE_DOWNLOAD_URL = server.download_url
+                downloader.ROW_DELAY_SECONDS = 0
+                downloader.RETRY_DELAY_SECONDS = 0
+                secs, m = timed(downloader.organize_files_from_csv, 'data.csv', 'public/image', quiet=not verbose)
+                m['http_requests'] = server.requests
+            m['source_bytes'] = sum(len(body) for body, _ in files.values())
+            result['organize_files_from_csv'] = {'seconds': secs, **m}
+
+        gen = GalleryGenerator()
+        gen.templates_dir = ROOT / 'templates'
+        secs, m = timed(gen.generate_all, quiet=not verbose)
+        result['generate_all'] = {'seconds': secs, **m}
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return result
+
+
+def stage_seconds(scale_result, stage):
+    entry = scale_result.get(stage) or {}
+    return entry.get('seconds')
+
+
+STAGES = ('generate_teams_yaml', 'organize_files_from_csv', 'generate_all')
+
+
+def print_table(results, baseline=None):
+    base_by_scale = {r['teams']: r for r in (baseline or {}).get('scales', [])}
+    print(f"\n{'teams':>8}  " + '  '.join(f"{s:>26}" for s in STAGES))
+    for r in results['scales']:
+        cells = []
+        for stage in STAGES:
+            secs = stage_seconds(r, stage)
+            if secs is None:
+                cells.append(f"{'skipped':>26}")
+                continue
+            cell = f"{secs:.3f}s"
+            base = stage_seconds(base_by_scale.get(r['teams'], {}), stage)
+            if base:
+                cell += f" ({(secs - base) / base * 100:+.1f}%)"
+            cells.append(f"{cell:>26}")
+        print(f"{r['teams']:>8}  " + '  '.join(cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=[10, 100, 1000], help='team counts to benchmark')
+    parser.add_argument('--stats', type=int, default=6, help='number of extra-stat groups in data.csv')
+    parser.add_argument('--image-size', type=int, nargs=2, default=[1600, 1200], metavar=('W', 'H'))
+    parser.add_argument('--latency', type=float, default=0.0, help='fake Drive per-request delay (seconds)')
+    parser.add_argument('--skip-download', action='store_true', help='skip the download + encode stage')
+    parser.add_argument('--label', default=None, help='result file name (default: git revision)')
+    parser.add_argument('--compare', type=Path, default=None, help='baseline results JSON to diff against')
+    parser.add_argument('--verbose', action='store_true', help='show pipeline output')
+    args = parser.parse_args()
+
+    label = args.label or git_revision() or datetime.now().strftime('%Y%m%d-%H%M%S')
+    results = {
+        'label': label,
+        'revision': git_revision(),
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'params': {'stats': args.stats, 'image_size': args.image_size, 'latency': args.latency},
+        'scales': [],
+    }
+    for n in args.scales:
+        print(f"⏱️ Benchmarking {n} teams...")
+        results['scales'].append(
+            bench_scale(n, args.stats, tuple(args.image_size), args.skip_download, args.latency, args.verbose)
+        )
+
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    out_path = RESULTS_DIR / f'{label}.json'
+    with open(out_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_table(results, baseline)
+    for r in results['scales']:
+        skipped = (r.get('organize_files_from_csv') or {}).get('skipped')
+        if skipped:
+            print(f"ℹ️ Download stage skipped ({skipped})")
+            break
+    print(f"\n📁 Results: {out_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Duplicate detection for downloader.py.
+
+Three levels, cheapest first:
+1. the same Drive file ID appears again -> nothing is downloaded,
+2. the downloaded bytes hash (SHA-256) to an earlier submission -> nothing is encoded,
+3. the decoded image's perceptual hash (64-bit dHash) is within `near_threshold`
+   bits of an earlier one, and their 32x32 thumbnails differ by at most
+   `near_max_pixel_diff` on average -> a near-duplicate (re-saved, resized or
+   recompressed copy). The dHash only compares brightness gradient directions,
+   so the thumbnail check weeds out different pictures that happen to share them.
+
+Same-file and exact duplicates are hardlinked to the output that was already
+produced, so each distinct file is encoded once. Near-duplicates are only
+probably the same photo (burst frames and re-crops hash close too), so by
+default they are encoded separately and listed, together with exact
+duplicates shared by different teams, in a CSV report for the organizers;
+`link_near_duplicates: same_team` or `always` opts into linking them.
+
+Settings come from the `dedupe:` block of config.yaml; see DEFAULTS.
+"""
+
+import csv
+import hashlib
+import os
+import shutil
+
+from PIL import Image
+
+import metrics
+
+
+DEFAULTS = {
+    'enabled': True,
+    'near_threshold': 6,                # max differing dHash bits (of 64) for a near-duplicate; 0 disables
+    'near_max_pixel_diff': 3,           # max mean per-channel difference (0-255) of the thumbnails; 0 skips the check
+    'link_near_duplicates': 'never',    # never (report only), same_team or always
+    'report_path': 'duplicates.csv',
+}
+LINK_NEAR_CHOICES = ('same_team', 'always', 'never')
+# dHash bands used to find near-duplicate candidates: two hashes within
+# HASH_BANDS - 1 bits must agree on at least one whole band (pigeonhole).
+HASH_BANDS = 8
+BAND_BITS = 64 // HASH_BANDS
+# Edge of the RGB thumbnail kept per output for the pixel check (3 KB each).
+THUMB_SIZE = 32
+
+
+def content_hasher():
+    return hashlib.sha256()
+
+
+def perceptual_hash(im):
+    """64-bit difference hash: brightness gradients of a 9x8 grayscale thumbnail."""
+    if im.mode not in ('L', 'RGB', 'RGBA'):
+        im = im.convert('RGB')
+    small = im.resize((9, 8), Image.Resampling.BILINEAR, reducing_gap=2.0).convert('L')
+    px = small.tobytes()
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            bits = (bits << 1) | (px[row * 9 + col] < px[row * 9 + col + 1])
+    return bits
+
+
+def pixel_thumbnail(im):
+    """THUMB_SIZE x THUMB_SIZE RGB thumbnail (raw bytes) for confirming near-duplicates."""
+    if im.mode not in ('L', 'RGB', 'RGBA'):
+        im = im.convert('RGB')
+    small = im.resize((THUMB_SIZE, THUMB_SIZE), Image.Resampling.BOX, reducing_gap=2.0)
+    return small.convert('RGB').tobytes()
+
+
+def pixel_difference(a, b):
+    """Mean absolute difference (0-255) between two pixel_thumbnail() results."""
+    return sum(abs(x - y) for x, y in zip(a, b)) / len(a)
+
+
+def link_or_copy(src, dst):
+    """Hardlink dst to src, copying when the filesystem can't link."""
+    if os.path.exists(dst):
+        os.remove(dst)
+    os.makedirs(os.path.dirname(dst) or '.', exist_ok=True)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+class Deduper:
+    def __init__(self, **settings):
+        unknown = set(settings) - set(DEFAULTS)
+        if unknown:
+            raise ValueError(f"Unknown dedupe setting(s): {', '.join(sorted(unknown))}")
+        self.settings = {**DEFAULTS, **{k: v for k, v in settings.items() if v is not None}}
+        if self.settings['link_near_duplicates'] not in LINK_NEAR_CHOICES:
+            raise ValueError(f"dedupe.link_near_duplicates must be one of {', '.join(LINK_NEAR_CHOICES)}")
+        if not 0 <= (self.settings['near_threshold'] or 0) < HASH_BANDS:
+            raise ValueError(f"dedupe.near_threshold must be between 0 and {HASH_BANDS - 1}")
+        if (self.settings['near_max_pixel_diff'] or 0) < 0:
+            raise ValueError("dedupe.near_max_pixel_diff must not be negative")
+        self.by_path = {}        # output path -> entry
+        self.by_file_id = {}     # Drive file ID -> entry
+        self.by_digest = {}      # SHA-256 hex -> entry
+        self.bands = {}          # (band, value) -> [entry, ...]
+        self.pairs = []          # report rows
+
+    @classmethod
+    def from_config(cls, config):
+        """Build a deduper from a parsed config.yaml dict (its optional `dedupe:` block)."""
+        return cls(**((config or {}).get('dedupe') or {}))
+
+    @property
+    def enabled(self):
+        return bool(self.settings['enabled'])
+
+    # ---------------- lookups (each links target_base to the earlier output on a hit) ----------------
+    def link_same_file(self, file_id, team, target_base):
+        """Link if this Drive file ID was already processed. Returns the new path or None."""
+        entry = self.by_file_id.get(file_id)
+        if entry is None:
+            return None
+        metrics.inc('duplicates_same_file')
+        return self._link(entry, team, target_base, 'same_file', 0)
+
+    def link_exact(self, digest, team, target_base):
+        """Link if identical bytes were already processed. Returns the new path or None."""
+        entry = self.by_digest.get(digest)
+        if entry is None:
+            return None
+        metrics.inc('duplicates_exact')
+        return self._link(entry, team, target_base, 'exact', 0)
+
+    def link_near(self, phash, team, target_base, thumb=None):
+        """Record near-duplicates of phash/thumb; link to one when the policy allows. Returns the new path or None."""
+        threshold = self.settings['near_threshold']
+        if not threshold:
+            return None
+        max_diff = self.settings['near_max_pixel_diff']
+        seen = set()
+        best = None
+        for band in range(HASH_BANDS):
+            key = (band, (phash >> (band * BAND_BITS)) & ((1 << BAND_BITS) - 1))
+            for entry in self.bands.get(key, ()):
+                if id(entry) in seen:
+                    continue
+                seen.add(id(entry))
+                distance = (entry['phash'] ^ phash).bit_count()
+                if distance > threshold or (best is not None and distance >= best[1]):
+                    continue
+                confirm = max_diff and thumb is not None and entry['thumb'] is not None
+                if confirm and pixel_difference(entry['thumb'], thumb) > max_diff:
+                    metrics.inc('near_candidates_rejected')
+                    continue
+                best = (entry, distance)
+        if best is None:
+            return None
+        entry, distance = best
+        metrics.inc('duplicates_near')
+        policy = self.settings['link_near_duplicates']
+        if policy == 'always' or (policy == 'same_team' and entry['team'] == team):
+            return self._link(entry, team, target_base, 'near', distance)
+        self._report('near', distance, entry, team, target_base)
+        return None
+
+    # ---------------- bookkeeping ----------------
+    def remember(self, team, output_path, file_id=None, digest=None, phash=None, thumb=None):
+        """Register an output (or add keys to an already registered one) so later submissions can link to it."""
+        entry = self.by_path.get(output_path)
+        if entry is None:
+            entry = self.by_path[output_path] = {'team': team, 'path': output_path, 'phash': None, 'thumb': None}
+        if phash is not None and entry['phash'] is None:
+            entry['phash'] = phash
+            entry['thumb'] = thumb
+        else:
+            phash = None  # already banded (or nothing to add)
+        if file_id:
+            self.by_file_id.setdefault(file_id, entry)
+        if digest:
+            self.by_digest.setdefault(digest, entry)
+        if phash is not None and self.settings['near_threshold']:
+            for band in range(HASH_BANDS):
+                key = (band, (phash >> (band * BAND_BITS)) & ((1 << BAND_BITS) - 1))
+                self.bands.setdefault(key, []).append(entry)
+        return entry
+
+    def _link(self, entry, team, target_base, kind, distance):
+        if not os.path.exists(entry['path']):
+            # The earlier output is gone (deleted or rebuilt since): process this submission normally
+            self._forget(entry)
+            return None
+        dst = os.path.splitext(target_base)[0] + os.path.splitext(entry['path'])[1]
+        if os.path.abspath(dst) != os.path.abspath(entry['path']):
+            link_or_copy(entry['path'], dst)
+        metrics.inc('duplicates_linked')
+        metrics.inc('bytes_deduplicated', os.path.getsize(dst))
+        if entry['team'] != team or kind == 'near':
+            self._report(kind, distance, entry, team, dst, linked=True)
+        print(f"🔗 {kind.replace('_', ' ')} duplicate of {entry['path']}, linked: {dst}")
+        return dst
+
+    def _forget(self, entry):
+        """Drop entry from every index so nothing links to it again."""
+        self.by_path.pop(entry['path'], None)
+        for index in (self.by_file_id, self.by_digest):
+            for key in [k for k, e in index.items() if e is entry]:
+                del index[key]
+        for key, entries in list(self.bands.items()):
+            kept = [e for e in entries if e is not entry]
+            if kept:
+                self.bands[key] = kept
+            else:
+                del self.bands[key]
+
+    def _report(self, kind, distance, entry, team, path, linked=False):
+        self.pairs.append({
+            'kind': kind,
+            'distance': distance,
+            'team_a': entry['team'],
+            'file_a': entry['path'],
+            'team_b': team,
+            'file_b': path,
+            'linked': 'yes' if linked else 'no',
+        })
+
+    def write_report(self):
+        """Write the duplicate pairs for organizers (header only when there are none)."""
+        path = self.settings['report_path']
+        if not path:
+            return
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=['kind', 'distance', 'team_a', 'file_a', 'team_b', 'file_b', 'linked'])
+            writer.writeheader()
+            writer.writerows(self.pairs)
+        cross_team = sum(1 for p in self.pairs if p['team_a'] != p['team_b'])
+        if self.pairs:
+            print(f"⚠️ {len(self.pairs)} duplicate pair(s), {cross_team} across teams: see {path}")
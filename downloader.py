@@ -9,7 +9,12 @@ This script downloads files from Google Drive links and organizes them into a st
 By default converts all downloaded images directly to AVIF (small size, high quality) unless run with --uncompressed.
 PDF files are converted to AVIF via pymupdf (fitz) rendering either directly or through PNG intermediate.
 Supports HEIC and HEIF image formats via pillow_heif integration.
-If a downloaded file is saved as .bin, this script inspects the content to detect PDF signatures before deciding conversion.
+Repeated Drive links, byte-identical files and near-identical photos are detected (see dedupe.py) and hardlinked
+to the already encoded output instead of being downloaded/encoded again; pairs are reported in duplicates.csv.
+Failed submissions are recorded in failures.jsonl (see failures.py); run with --retry-failed to reprocess only
+those, with backoff, merging the results into the existing public/image.
+The real file format is sniffed from the first bytes of the download stream (PDF, JPEG, PNG, GIF, WebP, TIFF, BMP, HEIF/AVIF),
+falling back to the Content-Type header, so each file is written once under its correct extension.
 """
 
 import os
@@ -20,12 +25,62 @@ import time
 import mimetypes
 import requests
 import shutil
+import yaml
 from pathlib import Path
-from PIL import Image
+from PIL import Image, UnidentifiedImageError
 
 import pillow_avif  # registers AVIF support in Pillow
 import fitz  # PyMuPDF for PDF rendering
 
+import metrics
+from avif_policy import AvifPolicy, ImageTooLarge
+from dedupe import Deduper, content_hasher, perceptual_hash, pixel_thumbnail
+from failures import FailureQueue
+from image_cache import ImageCache
+
+# Download endpoint and pacing; module-level so benchmarks can point them at a local fake Drive.
+DRIVE_DOWNLOAD_URL = "https://drive.google.com/uc?export=download&id={}"
+RETRY_DELAY_SECONDS = 2
+ROW_DELAY_SECONDS = 1
+# --retry-failed passes over failures.jsonl; the wait doubles after each pass
+RETRY_ROUNDS = 3
+RETRY_BACKOFF_SECONDS = 5
+# An encoded AVIF at or below this size is treated as broken.
+MIN_AVIF_BYTES = 1024
+
+# Only this much of a response is inspected to detect Drive's HTML interstitial and the file format.
+PEEK_BYTES = 4096
+CHUNK_BYTES = 64 * 1024
+# Interstitial pages are a few KB; anything bigger that claims to be HTML is not one.
+MAX_INTERSTITIAL_BYTES = 1024 * 1024
+
+MAGIC_SIGNATURES = (
+    (b'%PDF-', '.pdf'),
+    (b'\xff\xd8\xff', '.jpg'),
+    (b'\x89PNG\r\n\x1a\n', '.png'),
+    (b'GIF87a', '.gif'),
+    (b'GIF89a', '.gif'),
+    (b'II*\x00', '.tiff'),
+    (b'MM\x00*', '.tiff'),
+    (b'BM', '.bmp'),
+)
+# ISO-BMFF `ftyp` brands of HEIF-family images
+FTYP_BRANDS = {
+    b'heic': '.heic', b'heix': '.heic', b'heim': '.heic', b'heis': '.heic',
+    b'hevc': '.heic', b'hevx': '.heic', b'hevm': '.heic', b'hevs': '.heic',
+    b'mif1': '.heif', b'msf1': '.heif',
+    b'avif': '.avif', b'avis': '.avif',
+}
+
+# Encoding settings for this run; replaced from config.yaml's `avif:` block in __main__.
+AVIF_POLICY = AvifPolicy()
+# Duplicate detection for this run; replaced from config.yaml's `dedupe:` block in __main__.
+DEDUPER = Deduper()
+# Optional content-addressed store shared across runs/events (image_cache.py); set from
+# IMAGE_CACHE_DIR in __main__ or by batch.py.
+IMAGE_CACHE = None
+# Submissions that failed in this run (failures.py); loaded from failures.jsonl for --retry-failed.
+FAILURES = FailureQueue()
 
 # For HEIF/HEIC support lazy load
 _has_heif_support = False
@@ -78,217 +133,534 @@ def get_file_extension_from_headers(headers):
     return '.bin'
 
 
-def log_failure(message):
+def log_failure(message, stage=None, error=None):
+    """Append message to failed.txt; with a stage, also note it as the current submission's failure."""
+    metrics.inc('failures_logged')
     with open('failed.txt', 'a') as log:
         log.write(message + "\n")
+    if stage is not None:
+        FAILURES.note(stage, error, message)
+
+
+def sniff_extension(head):
+    """Return the file extension implied by the leading magic bytes, or None if unrecognized."""
+    for signature, ext in MAGIC_SIGNATURES:
+        if head.startswith(signature):
+            return ext
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return '.webp'
+    if head[4:8] == b'ftyp':
+        if head[8:12] in FTYP_BRANDS:
+            return FTYP_BRANDS[head[8:12]]
+        # Major brand unknown: look through the compatible brands listed in the ftyp box
+        box_end = min(int.from_bytes(head[:4], 'big'), len(head))
+        for i in range(16, box_end - 3, 4):
+            if head[i:i + 4] in FTYP_BRANDS:
+                return FTYP_BRANDS[head[i:i + 4]]
+    return None
 
 
-def is_pdf_file(path):
-    """Simple check of PDF file signature (starts with %PDF)"""
-    try:
-        with open(path, 'rb') as f:
-            header = f.read(5)
-            return header == b'%PDF-'
-    except Exception:
-        return False
+def looks_like_html(head, headers):
+    if headers.get('content-type', '').lower().startswith('text/html'):
+        return True
+    lead = head.lstrip()[:15].lower()
+    return lead.startswith(b'<!doctype html') or lead.startswith(b'<html')
+
+
+def peek_stream(response):
+    """Read just the first PEEK_BYTES of a streamed response.
 
+    Returns (head, rest) where rest is the still-unconsumed chunk iterator, so
+    the body can be written out afterwards without being buffered or decoded.
+    """
+    chunks = response.iter_content(CHUNK_BYTES)
+    head = b''
+    for chunk in chunks:
+        head += chunk
+        if len(head) >= PEEK_BYTES:
+            break
+    return head, chunks
 
-def convert_pdf_to_avif(input_path):
+
+def find_confirm_token(head, rest):
+    """Extract the confirm token from a Drive "can't scan for viruses" interstitial page."""
+    page = bytearray(head)
+    for chunk in rest:
+        page += chunk
+        if len(page) > MAX_INTERSTITIAL_BYTES:
+            return None
+    text = page.decode('utf-8', errors='replace')
+    match = re.search(r'confirm=([0-9A-Za-z_-]+)', text) or re.search(r'name="confirm"\s+value="([0-9A-Za-z_-]+)"', text)
+    return match.group(1) if match else None
+
+
+def convert_pdf_to_avif(input_path, team=None):
     try:
-        doc = fitz.open(input_path)
-        if doc.page_count < 1:
-            raise RuntimeError("PDF has no pages")
-        page = doc.load_page(0)
-        pix = page.get_pixmap(alpha=False)
-        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-        avif_path = os.path.splitext(input_path)[0] + '.avif'
-        img.save(avif_path, format='AVIF', quality=80, speed=6)
-        doc.close()
+        with metrics.timer('encode_pdf'), fitz.open(input_path) as doc:
+            if doc.page_count < 1:
+                raise RuntimeError("PDF has no pages")
+            page = doc.load_page(0)
+            # Render straight at the target size rather than rasterizing and shrinking afterwards
+            zoom = AVIF_POLICY.pdf_zoom(page.rect.width, page.rect.height, input_path)
+            pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+            # Decode from the pixmap's memory view instead of a bytes copy of pix.samples
+            img = Image.frombuffer("RGB", (pix.width, pix.height), pix.samples_mv, "raw", "RGB", pix.stride, 1)
+            del pix
+            avif_path = os.path.splitext(input_path)[0] + '.avif'
+            phash = thumb = linked = None
+            if team is not None and DEDUPER.enabled:
+                phash, thumb = perceptual_hash(img), pixel_thumbnail(img)
+                linked = DEDUPER.link_near(phash, team, avif_path, thumb)
+            if not linked:
+                quality, speed = AVIF_POLICY.encode(img, avif_path)
+            del img
+        # The document is closed now, so the input can be removed (an open file can't be on Windows)
+        if linked:
+            os.remove(input_path)
+            return linked
+        if team is not None and DEDUPER.enabled:
+            DEDUPER.remember(team, avif_path, phash=phash, thumb=thumb)
+        metrics.inc('files_encoded')
+        metrics.inc('bytes_encoded', os.path.getsize(avif_path))
         os.remove(input_path)
-        print(f"Converted PDF {input_path} to {avif_path} (AVIF, quality=80)")
+        print(f"Converted PDF {input_path} to {avif_path} (AVIF, quality={quality}, speed={speed})")
         return avif_path
+    except ImageTooLarge as e:
+        log_failure(f"PDF to AVIF conversion skipped: {e}", 'encode', type(e).__name__)
+        return None
     except Exception as e:
-        log_failure(f"PDF to AVIF conversion failed for {input_path}: {e}")
+        log_failure(f"PDF to AVIF conversion failed for {input_path}: {e}", 'encode', type(e).__name__)
         return None
 
 
-def convert_to_avif_high_quality(input_path):
+def usable_output(path):
+    """True when an encoded output exists and is larger than MIN_AVIF_BYTES."""
+    return os.path.exists(path) and os.path.getsize(path) > MIN_AVIF_BYTES
+
+
+def convert_to_avif_high_quality(input_path, team=None):
     try:
-        # Open and convert the image
-        with Image.open(input_path) as im:
+        # Open (at reduced decode size where possible) and convert the image
+        phash = thumb = None
+        with metrics.timer('encode_image'), AVIF_POLICY.open_image(input_path) as im:
             avif_path = os.path.splitext(input_path)[0] + '.avif'
-            im.save(avif_path, format='AVIF', quality=80, speed=6)
+            if team is not None and DEDUPER.enabled:
+                # A near-duplicate of an earlier submission may be linked instead of encoded
+                phash, thumb = perceptual_hash(im), pixel_thumbnail(im)
+                linked = DEDUPER.link_near(phash, team, avif_path, thumb)
+                if linked:
+                    im.close()
+                    os.remove(input_path)
+                    return linked
+            quality, speed = AVIF_POLICY.encode(im, avif_path)
         
         # Verify the AVIF file was created and is not empty
-        if os.path.exists(avif_path) and os.path.getsize(avif_path) > 1024:  # Ensure file is > 1KB
+        if usable_output(avif_path):
+            if team is not None and DEDUPER.enabled:
+                DEDUPER.remember(team, avif_path, phash=phash, thumb=thumb)
+            metrics.inc('files_encoded')
+            metrics.inc('bytes_encoded', os.path.getsize(avif_path))
             # Explicitly delete the original file
             os.remove(input_path)
-            print(f"Converted {input_path} to {avif_path} (AVIF, quality=80)")
+            print(f"Converted {input_path} to {avif_path} (AVIF, quality={quality}, speed={speed})")
             print(f"Deleted original file: {input_path}")
             return avif_path
         else:
-            log_failure(f"AVIF file {avif_path} was not created or is too small")
+            log_failure(f"AVIF file {avif_path} was not created or is too small", 'encode', 'EmptyOutput')
+            if os.path.exists(avif_path):
+                os.remove(avif_path)  # don't leave a broken image where the gallery (or --retry-failed) would take it as done
             return None
+    except ImageTooLarge as e:
+        log_failure(f"AVIF conversion skipped: {e}", 'encode', type(e).__name__)
+        return None
+    except (Image.DecompressionBombError, MemoryError) as e:
+        log_failure(f"AVIF conversion skipped, image too large for {input_path}: {e}", 'encode', type(e).__name__)
+        return None
     except Exception as e:
-        log_failure(f"AVIF conversion failed for {input_path}: {e}")
+        # Bytes that neither the sniffer nor Pillow recognize are a sniff failure, not an encoder one
+        stage = 'sniff' if isinstance(e, UnidentifiedImageError) else 'encode'
+        log_failure(f"AVIF conversion failed for {input_path}: {e}", stage, type(e).__name__)
         return None
 
-def download_file_from_drive(file_id, output_base, uncompressed=False, max_retries=3):
+def download_file_from_drive(file_id, output_base, uncompressed=False, max_retries=3, team=None):
+    # `team` enables duplicate detection for this submission (see dedupe.py)
+    dedupe = team is not None and DEDUPER.enabled
+    if dedupe and DEDUPER.link_same_file(file_id, team, output_base):
+        metrics.inc('downloads_skipped')
+        return True
+    if IMAGE_CACHE is not None and link_from_cache(file_id, output_base, uncompressed, team if dedupe else None):
+        metrics.inc('downloads_skipped')
+        return True
+
     session = requests.Session()
-    base_url = "https://drive.google.com/uc?export=download&id={}"
+    base_url = DRIVE_DOWNLOAD_URL
 
     for attempt in range(max_retries):
         try:
-            response = session.get(base_url.format(file_id), stream=True)
-            if 'download_warning' in response.text:
-                for line in response.text.splitlines():
-                    if 'confirm=' in line:
-                        token = re.search(r'confirm=([^&]+)', line).group(1)
-                        response = session.get(f"{base_url.format(file_id)}&confirm={token}", stream=True)
-                        break
+            metrics.inc('download_attempts')
+            with metrics.timer('download_request'):
+                response = session.get(base_url.format(file_id), stream=True)
+                head, rest = peek_stream(response)
+                if response.status_code == 200 and looks_like_html(head, response.headers):
+                    # Large files get an HTML warning page first; only that small page is read as text
+                    token = find_confirm_token(head, rest)
+                    response.close()
+                    if not token:
+                        log_failure(f"Drive returned an HTML page without a download for ID {file_id}", 'sniff', 'HTMLPage')
+                        return False
+                    metrics.inc('confirm_interstitials')
+                    response = session.get(f"{base_url.format(file_id)}&confirm={token}", stream=True)
+                    head, rest = peek_stream(response)
             if response.status_code != 200:
-                log_failure(f"Download failed (HTTP {response.status_code}) for ID {file_id}")
-                time.sleep(2)
+                log_failure(f"Download failed (HTTP {response.status_code}) for ID {file_id}",
+                            'download', f"HTTP {response.status_code}")
+                response.close()
+                time.sleep(RETRY_DELAY_SECONDS)
                 continue
 
-            ext = get_file_extension_from_headers(response.headers)
+            # Trust the bytes over the Content-Type header, which Drive often leaves generic
+            ext = sniff_extension(head) or get_file_extension_from_headers(response.headers)
 
-            # Save raw file
-            raw_path = output_base.replace('.avif', ext)
+            # Save raw file in one pass: the peeked head, then the rest of the stream
+            raw_path = os.path.splitext(output_base)[0] + ext
             os.makedirs(os.path.dirname(raw_path), exist_ok=True)
-            with open(raw_path, 'wb') as f:
-                for chunk in response.iter_content(8192):
+            hasher = content_hasher() if dedupe or IMAGE_CACHE is not None else None
+            part_path = raw_path + '.part'
+            with metrics.timer('download'), open(part_path, 'wb') as f:
+                f.write(head)
+                metrics.inc('bytes_downloaded', len(head))
+                if hasher:
+                    hasher.update(head)
+                for chunk in rest:
                     if chunk:
                         f.write(chunk)
+                        metrics.inc('bytes_downloaded', len(chunk))
+                        if hasher:
+                            hasher.update(chunk)
+            os.replace(part_path, raw_path)
+            metrics.inc('files_downloaded')
             print(f"✓ Downloaded: {raw_path}")
 
-            if uncompressed:
+            digest = hasher.hexdigest() if hasher else None
+            linked = DEDUPER.link_exact(digest, team, output_base) if dedupe and digest else None
+            if linked:
+                # Identical bytes were already processed: reuse that output, skip decoding/encoding
+                if linked != raw_path:
+                    os.remove(raw_path)
+                DEDUPER.remember(team, linked, file_id=file_id)
                 return True
-
-            # If got .bin file, try to detect PDF or HEIC/HEIF
-            if ext == '.bin':
-                if is_pdf_file(raw_path):
-                    ext = '.pdf'
-                    # Rename to .pdf for clarity
-                    new_path = os.path.splitext(raw_path)[0] + '.pdf'
-                    os.rename(raw_path, new_path)
-                    raw_path = new_path
-                    print(f"ℹ️ Detected PDF content in .bin, renamed to {raw_path}")
-                else:
-                    # Assume heif/heic candidate, register support
-                    ext = '.heic'  # or .heif, pick .heic as default
-                    new_path = os.path.splitext(raw_path)[0] + ext 
-                    os.rename(raw_path, new_path)
-                    raw_path = new_path
-                    print(f"ℹ️ Treated .bin as HEIC/HEIF, renamed to {raw_path}")
-                    register_heif_if_needed()
-
-            if ext == '.pdf':
-                print(f"ℹ️ Attempting PDF to AVIF conversion for {raw_path}")
-                avif_path = convert_pdf_to_avif(raw_path)
-                if avif_path:
-                    print(f"✓ PDF converted to AVIF: {avif_path}")
+            if IMAGE_CACHE is not None:
+                IMAGE_CACHE.put_source(file_id, digest, ext, raw_path)
+                cached = None if uncompressed else IMAGE_CACHE.link_encoded(digest, output_base)
+                if cached:
+                    if cached != raw_path:
+                        os.remove(raw_path)
+                    if dedupe:
+                        DEDUPER.remember(team, cached, file_id=file_id, digest=digest)
                     return True
-                else:
-                    print(f"✗ PDF to AVIF conversion failed for {raw_path}")
-                    return False
-
-            elif ext.lower() in ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.tiff', '.heic', '.heif']:
-                avif_path = convert_to_avif_high_quality(raw_path)
-                if avif_path:
-                    return True
-                else:
-                    print(f"✗ AVIF conversion failed for {raw_path}")
-                    return False
 
+            final_path = finish_download(raw_path, ext, uncompressed, team if dedupe else None)
+            if final_path is None:
+                return False
+            cache_output(digest, final_path, uncompressed, team if dedupe else None)
+            if dedupe:
+                DEDUPER.remember(team, final_path, file_id=file_id, digest=digest)
             return True
 
         except Exception as e:
-            log_failure(f"Attempt {attempt+1} exception for ID {file_id}: {e}")
-            time.sleep(2)
+            log_failure(f"Attempt {attempt+1} exception for ID {file_id}: {e}", 'download', type(e).__name__)
+            time.sleep(RETRY_DELAY_SECONDS)
 
     return False
 
 
+def link_from_cache(file_id, output_base, uncompressed=False, team=None):
+    """Serve a submission from IMAGE_CACHE without downloading it. Returns True on a hit."""
+    known = IMAGE_CACHE.lookup_id(file_id)
+    if known is None:
+        return False
+    digest, ext = known
+    path = None if uncompressed else IMAGE_CACHE.link_encoded(digest, output_base)
+    if path is None:
+        # Encoded with other settings (or not at all): re-encode the cached source
+        raw_path = IMAGE_CACHE.link_source(digest, ext, output_base)
+        if raw_path is None:
+            return False
+        path = finish_download(raw_path, ext, uncompressed, team)
+        if path is None:
+            return False
+        cache_output(digest, path, uncompressed, team)
+    print(f"♻️ From image cache: {path}")
+    if team is not None:
+        DEDUPER.remember(team, path, file_id=file_id, digest=digest)
+    return True
+
+
+def cache_output(digest, path, uncompressed=False, team=None):
+    """Store a freshly encoded AVIF in IMAGE_CACHE."""
+    if IMAGE_CACHE is None or uncompressed or not digest or not path.endswith('.avif'):
+        return
+    if team is not None and DEDUPER.by_path.get(path) is None:
+        # Not encoded from this source (kept-as-is AVIF or a near-duplicate link)
+        return
+    IMAGE_CACHE.put_encoded(digest, path)
+
+
+def finish_download(raw_path, ext, uncompressed=False, team=None):
+    """Convert a downloaded file as needed. Returns the final output path, or None on failure."""
+    if uncompressed:
+        return raw_path
+
+    if ext == '.avif':
+        print(f"ℹ️ Submission is already AVIF, kept as-is: {raw_path}")
+        return raw_path
+
+    if ext in ('.heic', '.heif', '.bin'):
+        # Unrecognized bytes still go through Pillow, which identifies formats itself
+        register_heif_if_needed()
+
+    if ext == '.pdf':
+        print(f"ℹ️ Attempting PDF to AVIF conversion for {raw_path}")
+        avif_path = convert_pdf_to_avif(raw_path, team)
+        if avif_path:
+            print(f"✓ PDF converted to AVIF: {avif_path}")
+        else:
+            print(f"✗ PDF to AVIF conversion failed for {raw_path}")
+        return avif_path
+
+    elif ext.lower() in ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.tiff', '.heic', '.heif', '.bin']:
+        avif_path = convert_to_avif_high_quality(raw_path, team)
+        if not avif_path:
+            print(f"✗ AVIF conversion failed for {raw_path}")
+        return avif_path
+
+    return raw_path
+
+
 def extract_team_number(team_str):
     m = re.search(r'Team (\d+)', team_str)
     return m.group(1) if m else team_str.replace('Team ', '').strip()
 
 
+def submission_targets(row, team_dir, has_single_submission):
+    """(label, url, output base) for each submission column of a CSV row."""
+    if has_single_submission:
+        return [('Photo', (row.get('Submission Image') or '').strip(), os.path.join(team_dir, 'Photo.avif'))]
+    return [(f'Photo {i}', (row.get(f'Submission Image {i}') or '').strip(), os.path.join(team_dir, f'Photo{i}.avif'))
+            for i in range(1, 5)]
+
+
+def process_submission(team, label, url, target, uncompressed=False):
+    """Download/convert one submission and record the outcome in FAILURES. Returns True on success."""
+    try:
+        return _process_submission(team, label, url, target, uncompressed)
+    finally:
+        # Keep the encode time budget spread over what is really left, however this one ended
+        AVIF_POLICY.submission_done()
+
+
+def _process_submission(team, label, url, target, uncompressed):
+    fid = extract_file_id_from_drive_url(url)
+    if not fid:
+        print(f" ⚠️ Invalid URL for {label}")
+        log_failure(f"Invalid Drive URL for team {team} {label}: {url}", 'download', 'InvalidURL')
+        FAILURES.record(team, None, target, False, url)
+        return False
+    print(f" 📥 Downloading {label}...")
+    ok = download_file_from_drive(fid, target, uncompressed, team=team)
+    if not ok:
+        print(f" ✗ Failed {label}")
+    FAILURES.record(team, fid, target, ok, url)
+    return ok
+
+
+def read_submissions(csv_path):
+    """Rows of the CSV plus whether it uses the single 'Submission Image' column."""
+    with open(csv_path, encoding='utf-8') as csvfile:
+        reader = csv.DictReader(csvfile)
+        return list(reader), 'Submission Image' in (reader.fieldnames or [])
+
+
 def organize_files_from_csv(csv_path, out_dir='dist/image', uncompressed=False):
+    global DEDUPER, FAILURES
     if not os.path.exists(csv_path):
         print(f"✗ CSV not found: {csv_path}")
         return
     os.makedirs(out_dir, exist_ok=True)
+    # A full run processes every submission again, so it starts a fresh duplicate index
+    # (earlier outputs may be gone) and failure queue, keeping their settings
+    DEDUPER = Deduper(**DEDUPER.settings)
+    FAILURES = FailureQueue(FAILURES.path)
     succ = fail = 0
-    
-    with open(csv_path, encoding='utf-8') as csvfile:
-        reader = csv.DictReader(csvfile)
-        headers = reader.fieldnames
-        
-        has_single_submission = 'Submission Image' in headers
 
-        for row in reader:
-            team_num = extract_team_number(row.get('Team Number', ''))
-            if not team_num:
-                continue
+    rows, has_single_submission = read_submissions(csv_path)
 
-            team_dir = os.path.join(out_dir, team_num)
-            os.makedirs(team_dir, exist_ok=True)
-            print(f"\n📋 Team {team_num}: {row.get('Team Name','')}")
-
-            if has_single_submission:
-                url = row.get('Submission Image', '').strip()
-                if url:
-                    fid = extract_file_id_from_drive_url(url)
-                    if fid:
-                        target = os.path.join(team_dir, 'Photo.avif')
-                        print(f" 📥 Downloading Photo...")
-                        if download_file_from_drive(fid, target, uncompressed):
-                            succ += 1
-                        else:
-                            print(f" ✗ Failed Photo")
-                            fail += 1
-                    else:
-                        print(f" ⚠️ Invalid URL for Photo")
-                        fail += 1
-                else:
-                    print(f" ⚠️ No URL for Photo")
+    # Let the encoder pace its time budget across every submission in the sheet
+    url_columns = ['Submission Image'] if has_single_submission else [f'Submission Image {i}' for i in range(1, 5)]
+    AVIF_POLICY.expect(sum(1 for row in rows if extract_team_number(row.get('Team Number', ''))
+                           for col in url_columns if (row.get(col) or '').strip()))
+
+    for row in rows:
+        metrics.inc('rows_parsed')
+        team_num = extract_team_number(row.get('Team Number', ''))
+        if not team_num:
+            continue
+
+        team_dir = os.path.join(out_dir, team_num)
+        os.makedirs(team_dir, exist_ok=True)
+        print(f"\n📋 Team {team_num}: {row.get('Team Name','')}")
+
+        for label, url, target in submission_targets(row, team_dir, has_single_submission):
+            if not url:
+                if has_single_submission:
+                    print(f" ⚠️ No URL for {label}")
+                continue
+            if process_submission(team_num, label, url, target, uncompressed):
+                succ += 1
             else:
-                # Fallback to old logic
-                for i in range(1, 5):
-                    url = row.get(f'Submission Image {i}', '').strip()
-                    if not url:
-                        continue
-                    fid = extract_file_id_from_drive_url(url)
-                    if not fid:
-                        print(f" ⚠️ Invalid URL for Photo {i}")
-                        fail += 1
-                        continue
-                    target = os.path.join(team_dir, f'Photo{i}.avif')
-                    print(f" 📥 Downloading Photo {i}...")
-                    if download_file_from_drive(fid, target, uncompressed):
-                        succ += 1
-                    else:
-                        print(f" ✗ Failed Photo {i}")
-                        fail += 1
-            time.sleep(1)
+                fail += 1
+        time.sleep(ROW_DELAY_SECONDS)
+    metrics.inc('files_succeeded', succ)
+    metrics.inc('files_failed', fail)
+    if DEDUPER.enabled:
+        DEDUPER.write_report()
+    FAILURES.save()
+    metrics.inc('failures_open', len(FAILURES))
     print(f"\n📊 Completed: {succ} succeeded, {fail} failed")
+    if fail:
+        print(f"📝 Failures recorded in {FAILURES.path} ({describe_stages(FAILURES)}); "
+              f"retry them with: python downloader.py --retry-failed")
     print(f"📁 Files in {os.path.abspath(out_dir)}")
 
 
+def remove_leftovers(target):
+    """Delete raw/partial files a failed attempt left next to target (e.g. Photo1.bin, Photo1.jpg.part)."""
+    stem = os.path.splitext(target)[0]
+    folder = os.path.dirname(target) or '.'
+    prefix = os.path.basename(stem) + '.'
+    for name in os.listdir(folder):
+        if name.startswith(prefix):
+            os.remove(os.path.join(folder, name))
+
+
+def describe_stages(queue):
+    return ', '.join(f"{n} {stage}" for stage, n in sorted(queue.summary().items()))
+
+
+def retry_failed(csv_path='data.csv', out_dir='public/image', uncompressed=False, rounds=None):
+    """Reprocess only the submissions in FAILURES, waiting longer before each further pass.
+
+    Outputs are merged into out_dir: only the failed targets' own leftovers are
+    deleted, and a target that already holds a usable AVIF is treated as done.
+    Links are re-read from the CSV when it still has the submission, so a link
+    fixed in the sheet since the full run is picked up.
+    """
+    rounds = RETRY_ROUNDS if rounds is None else rounds
+    if not len(FAILURES):
+        print(f"✓ Nothing to retry: {FAILURES.path} has no open failures")
+        return
+    current = {}
+    if os.path.exists(csv_path):
+        rows, has_single_submission = read_submissions(csv_path)
+        for row in rows:
+            team_num = extract_team_number(row.get('Team Number', ''))
+            if team_num:
+                for label, url, target in submission_targets(row, os.path.join(out_dir, team_num), has_single_submission):
+                    current[os.path.normpath(target)] = url
+    succ = 0
+
+    for round_number in range(rounds):
+        if not len(FAILURES):
+            break
+        if round_number:
+            if all(e['error_class'] == 'InvalidURL' for e in FAILURES.pending()):
+                break  # only broken links left: another pass can't fix those
+            delay = RETRY_BACKOFF_SECONDS * 2 ** (round_number - 1)
+            print(f"\n⏳ {len(FAILURES)} still failing, next pass in {delay}s")
+            time.sleep(delay)
+        entries = [e for e in FAILURES.pending() if not (round_number and e['error_class'] == 'InvalidURL')]
+        # Pace the encode time budget over this pass
+        AVIF_POLICY.expect(len(entries))
+        print(f"\n🔁 Retry pass {round_number + 1}/{rounds}: {len(entries)} submission(s)")
+        for entry in entries:
+            team, target = entry['team'], entry['target']
+            label = os.path.splitext(os.path.basename(target))[0]
+            print(f"\n📋 Team {team}: {label} (attempt {entry['attempts'] + 1}, last {entry['stage']}: {entry['error_class']})")
+            # A partial or rejected .avif at target is not a success; remove_leftovers() clears it below
+            if not uncompressed and usable_output(target):
+                print(f" ✓ Already present: {target}")
+                AVIF_POLICY.submission_done()
+                FAILURES.record(team, entry.get('file_id'), target, True)
+                succ += 1
+                continue
+            os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+            remove_leftovers(target)
+            url = current.get(os.path.normpath(target)) or entry.get('url')
+            if url:
+                ok = process_submission(team, label, url, target, uncompressed)
+            else:
+                print(f" 📥 Downloading {label}...")
+                ok = download_file_from_drive(entry['file_id'], target, uncompressed, team=team)
+                FAILURES.record(team, entry['file_id'], target, ok)
+                AVIF_POLICY.submission_done()
+            succ += ok
+            time.sleep(ROW_DELAY_SECONDS)
+        # Persist after every pass so an interrupted retry loses nothing
+        FAILURES.save()
+
+    metrics.inc('files_succeeded', succ)
+    metrics.inc('files_failed', len(FAILURES))
+    metrics.inc('failures_open', len(FAILURES))
+    print(f"\n📊 Retry completed: {succ} recovered, {len(FAILURES)} still failing")
+    if len(FAILURES):
+        print(f"📝 Still open in {FAILURES.path} ({describe_stages(FAILURES)})")
+    print(f"📁 Files in {os.path.abspath(out_dir)}")
+
+
+def load_config(config_path='config.yaml'):
+    """Parsed config.yaml, or an empty dict when there is none."""
+    if not os.path.exists(config_path):
+        return {}
+    with open(config_path, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f) or {}
+
+
+def load_avif_policy(config_path='config.yaml'):
+    """Build the AVIF policy from config.yaml's `avif:` block (defaults when absent)."""
+    return AvifPolicy.from_config(load_config(config_path))
+
+
+def load_deduper(config_path='config.yaml'):
+    """Build the duplicate detector from config.yaml's `dedupe:` block (defaults when absent)."""
+    return Deduper.from_config(load_config(config_path))
+
+
 if __name__ == "__main__":
     uncompressed = '--uncompressed' in sys.argv
+    retry = '--retry-failed' in sys.argv
+    AVIF_POLICY = load_avif_policy()
+    DEDUPER = load_deduper()
+    if os.environ.get('IMAGE_CACHE_DIR'):
+        IMAGE_CACHE = ImageCache.from_config(os.environ['IMAGE_CACHE_DIR'], AVIF_POLICY.output_key(), load_config())
     CSV_FILE = "data.csv"
     OUT_DIR = "public/image"
     OUT_PATH = Path(OUT_DIR)
-    if OUT_PATH.exists():
-        shutil.rmtree(OUT_PATH)
-    OUT_PATH.mkdir(parents=True, exist_ok=True)
 
     print("🚀 Starting Organizer")
     if uncompressed:
         print("ℹ️ Skipping AVIF conversion (--uncompressed)")
     print("=" * 40)
-    organize_files_from_csv(CSV_FILE, OUT_DIR, uncompressed)
-    print("\n🎉 Done! Use --uncompressed to keep originals.")
+    if retry:
+        # Merge into the existing output: only the recorded failures are touched
+        FAILURES = FailureQueue.load()
+        OUT_PATH.mkdir(parents=True, exist_ok=True)
+        with metrics.timer('retry_failed'):
+            retry_failed(CSV_FILE, OUT_DIR, uncompressed)
+    else:
+        if OUT_PATH.exists():
+            shutil.rmtree(OUT_PATH)
+        OUT_PATH.mkdir(parents=True, exist_ok=True)
+        with metrics.timer('organize'):
+            organize_files_from_csv(CSV_FILE, OUT_DIR, uncompressed)
+    metrics.write_report('downloader')
+    print("\n🎉 Done! Use --uncompressed to keep originals, --retry-failed to retry only failed submissions.")
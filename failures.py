@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Structured record of submissions the downloader could not produce.
+
+Every failed submission is one JSON line in failures.jsonl (next to the
+free-text failed.txt log), keyed by its output path:
+
+    {"team": "3", "file_id": "1AbC...", "target": "public/image/3/Photo2.avif",
+     "stage": "download", "error_class": "ConnectionError", "message": "...",
+     "attempts": 2, "first_failed": "2025-08-23T10:02:11", "last_failed": "..."}
+
+`stage` is where the last attempt stopped: download (network/HTTP), sniff
+(Drive served no file, or the bytes aren't an image Pillow can identify) or
+encode (decode/AVIF conversion). `attempts` counts processing passes (the full
+run plus each `--retry-failed` pass), not individual HTTP requests.
+
+The downloader notes the most recent error through log_failure(); the
+per-submission outcome is then recorded with record(), which clears the entry
+on success. `python downloader.py --retry-failed` reprocesses only the open
+entries, so re-running it is safe and never touches usable outputs that already exist.
+"""
+
+import json
+import os
+import time
+
+import metrics
+
+
+STAGES = ('download', 'sniff', 'encode')
+
+
+def _now():
+    return time.strftime('%Y-%m-%dT%H:%M:%S')
+
+
+class FailureQueue:
+    def __init__(self, path='failures.jsonl'):
+        self.path = path
+        self.entries = {}   # target path -> entry, in first-failure order
+        self.last = None    # most recent noted error for the submission being processed
+
+    @classmethod
+    def load(cls, path='failures.jsonl'):
+        """Read open entries from path (an empty queue when the file doesn't exist)."""
+        queue = cls(path)
+        if not os.path.exists(path):
+            return queue
+        with open(path, 'r', encoding='utf-8') as f:
+            for number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                    queue.entries[entry['target']] = entry
+                except (ValueError, KeyError) as e:
+                    print(f"⚠️ Skipping unreadable line {number} in {path}: {e}")
+        return queue
+
+    def __len__(self):
+        return len(self.entries)
+
+    def pending(self):
+        return list(self.entries.values())
+
+    def note(self, stage, error_class, message):
+        """Remember why the current submission failed; the last note before record() wins."""
+        if stage not in STAGES:
+            raise ValueError(f"Unknown failure stage: {stage}")
+        self.last = {'stage': stage, 'error_class': error_class, 'message': message}
+
+    def record(self, team, file_id, target, ok, url=None):
+        """Store the outcome of one processing pass for target (resolving or updating its entry)."""
+        note, self.last = self.last, None
+        entry = self.entries.get(target)
+        if ok:
+            if entry is not None:
+                del self.entries[target]
+                metrics.inc('failures_resolved')
+            return
+        note = note or {'stage': 'download', 'error_class': 'Unknown', 'message': ''}
+        if entry is None:
+            entry = self.entries[target] = {
+                'team': team,
+                'file_id': file_id,
+                'url': url,
+                'target': target,
+                'attempts': 0,
+                'first_failed': _now(),
+            }
+        entry.update(note)
+        entry['file_id'] = file_id or entry.get('file_id')
+        entry['attempts'] += 1
+        entry['last_failed'] = _now()
+
+    def save(self):
+        """Rewrite the queue atomically; an empty queue leaves an empty file."""
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            for entry in self.entries.values():
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        os.replace(tmp, self.path)
+
+    def summary(self):
+        """Counts of open entries per stage, e.g. {'download': 2, 'encode': 1}."""
+        counts = {}
+        for entry in self.entries.values():
+            counts[entry['stage']] = counts.get(entry['stage'], 0) + 1
+        return counts
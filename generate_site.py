@@ -7,29 +7,82 @@ Server-side rendering approach with templates and YAML data
 
 import yaml
 import json
+import hashlib
 import os
+import re
+import heapq
 import shutil
+import unicodedata
 from datetime import datetime
 from pathlib import Path
 
+import metrics
+
+
+# Matches {{PLACEHOLDER}} markers in templates. The quoted variant is used for
+# script.js where the marker sits inside a string literal that gets replaced whole.
+PLACEHOLDER_RE = re.compile(r"\{\{([A-Z_]+)\}\}")
+QUOTED_PLACEHOLDER_RE = re.compile(r"'\{\{([A-Z_]+)\}\}'")
+# Search index: n-gram length for longer query words; shorter words use word-prefix lists.
+SEARCH_NGRAM = 3
+SEARCH_SEPARATOR_RE = re.compile(r"[\W_]+")
+# Service worker: files precached at install (everything else is cached on first use),
+# and build outputs it must not list (itself, host config, serve.py's precompressed siblings).
+SW_PRECACHE = ('index.html', 'style.css', 'script.js')
+SW_IMAGE_SUFFIXES = {'.avif', '.webp', '.jpg', '.jpeg', '.png', '.gif', '.svg', '.ico', '.bmp', '.tif', '.tiff', '.heic', '.heif'}
+SW_SKIP_NAMES = {'sw.js', '_headers', '_redirects'}
+SW_SKIP_SUFFIXES = {'.gz', '.br', '.tmp', '.part'}
+
+
+def normalize_search_text(text):
+    """Lowercase, strip accents and collapse everything but letters/digits to single spaces.
+
+    Mirrored by normalizeSearch() in script.js so queries and keys agree.
+    """
+    text = unicodedata.normalize('NFKD', str(text))
+    text = ''.join(ch for ch in text if not unicodedata.category(ch).startswith('M'))
+    return SEARCH_SEPARATOR_RE.sub(' ', text.lower()).strip()
+
+
+def link_or_copy(src, dst):
+    """copytree copy_function: hardlink dst to src, copying when the filesystem can't link."""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+    return dst
+
+
+def delta_encode(postings):
+    """Sorted team indices -> first value followed by gaps (smaller JSON)."""
+    out, prev = [], 0
+    for i in postings:
+        out.append(i - prev)
+        prev = i
+    return out
+
 
 class GalleryGenerator:
-    def __init__(self):
-        self.base_dir = Path('.')
-        self.templates_dir = self.base_dir / 'templates'
-        self.output_dir = self.base_dir / 'dist'
+    def __init__(self, base_dir='.', output_dir=None, templates_dir=None):
+        # base_dir holds config.yaml, teams.yaml and public/; batch.py points one generator per event at its own dirs
+        self.base_dir = Path(base_dir)
+        self.templates_dir = Path(templates_dir) if templates_dir else self.base_dir / 'templates'
+        self.output_dir = Path(output_dir) if output_dir else self.base_dir / 'dist'
         self.teams_data = None
         self.config = None
+        # watch.py turns this off: a caching worker would fight live reload
+        self.service_worker = True
 
 
     def load_data(self):
         """Load config from config.yaml and team data from teams.yaml"""
         try:
-            with open('config.yaml', 'r', encoding='utf-8') as f:
+            with metrics.timer('load_config'), open(self.base_dir / 'config.yaml', 'r', encoding='utf-8') as f:
                 self.config = yaml.safe_load(f)
-            with open('teams.yaml', 'r', encoding='utf-8') as f:
+            with metrics.timer('load_teams'), open(self.base_dir / 'teams.yaml', 'r', encoding='utf-8') as f:
                 teams_yaml = yaml.safe_load(f)
                 self.teams_data = teams_yaml.get('teams', [])
+                metrics.inc('teams_loaded', len(self.teams_data))
                 extra_stats = teams_yaml.get('extra_stats')
                 if extra_stats:
                     # Attach to config so frontend can access via CONFIG_DATA_PLACEHOLDER
@@ -48,7 +101,7 @@ class GalleryGenerator:
         """Create and clean output directory"""
         if self.output_dir.exists():
             shutil.rmtree(self.output_dir)
-        self.output_dir.mkdir(exist_ok=True)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
         
         # The downloader script now places images directly in dist/image,
         # so we just need to ensure the parent 'dist' directory is clean.
@@ -58,37 +111,22 @@ class GalleryGenerator:
 
 
     def generate_html(self):
-        """Generate index.html from template"""
+        """Generate index.html from template, streaming fragments straight to disk"""
         template_path = self.templates_dir / 'index.html'
         output_path = self.output_dir / 'index.html'
 
 
         try:
-            with open(template_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-
-
-            # Compute server-side results (winners, charts, extra stats) so modal opens instantly without heavy client JS loops
-            winners_html, winner_gallery_html, public_vote_svg, public_vote_legend, extra_stats_html, winner_preloads = self.build_results_fragments()
-
-            # Simple template replacements (ordered to avoid accidental re-replacement)
-            replacements = {
-                '{{SITE_TITLE}}': self.config.get('site_title', 'Photo Gallery'),
-                '{{FOOTER_TEXT}}': self.config.get('footer', {}).get('text', ''),
-                '{{MONO_LINK}}': self.config.get('footer', {}).get('mono_link', ''),
-                '{{WINNERS_LIST_HTML}}': winners_html,
-                '{{WINNER_GALLERY_HTML}}': winner_gallery_html,
-                '{{PUBLIC_VOTE_CHART_SVG}}': public_vote_svg,
-                '{{PUBLIC_VOTE_LEGEND_HTML}}': public_vote_legend,
-                '{{EXTRA_STATS_HTML}}': extra_stats_html,
-                '{{WINNER_PRELOAD_LINKS}}': winner_preloads,
+            # Server-side results (winners, charts, extra stats) are generators, so the
+            # document is never held in memory as a whole while it is written out.
+            sections = {
+                'SITE_TITLE': self.config.get('site_title', 'Photo Gallery'),
+                'FOOTER_TEXT': self.config.get('footer', {}).get('text', ''),
+                'MONO_LINK': self.config.get('footer', {}).get('mono_link', ''),
             }
-            for k,v in replacements.items():
-                content = content.replace(k, v)
-
-
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            sections.update(self.results_sections())
+            with open(template_path, 'r', encoding='utf-8') as f:
+                self.write_streamed(output_path, self.iter_template(f, sections))
 
 
             print(f"✓ Generated: {output_path}")
@@ -105,6 +143,8 @@ class GalleryGenerator:
         template_path = self.templates_dir / 'style.css'
         output_path = self.output_dir / 'style.css'
         try:
+            # Unlink first: a style.css linked in from public/ must not be overwritten in place
+            output_path.unlink(missing_ok=True)
             shutil.copy(template_path, output_path)
             print(f"✓ Generated: {output_path}")
             return True
@@ -120,49 +160,155 @@ class GalleryGenerator:
 
 
         try:
-            with open(template_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-
-
             # Anonymize team data if needed
             teams_for_js = self.teams_data
                 # Backward compatibility: if hide_team_data present and show_team_data absent, leave behavior to frontend logic
                 # No additional processing required here; frontend will interpret flags.
 
 
-            # Embed team data and config as JSON
-            teams_json = json.dumps(teams_for_js, indent=2)
-            config_json = json.dumps(self.config, indent=2)
-            
-            # Replace placeholders
-            content = content.replace("const TEAMS_DATA_PLACEHOLDER = '{{TEAMS_DATA}}';", f"const TEAMS_DATA_PLACEHOLDER = {teams_json};")
-            content = content.replace("const CONFIG_DATA_PLACEHOLDER = '{{CONFIG_DATA}}';", f"const CONFIG_DATA_PLACEHOLDER = {config_json};")
-
-            # Flag to tell frontend results are pre-rendered
-            content = content.replace('const CONFIG_DATA_PLACEHOLDER =', 'const RESULTS_PRERENDERED = true;\nconst CONFIG_DATA_PLACEHOLDER =')
-
-
-
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            # Embed team data and config as JSON, encoded incrementally while writing
+            encoder = json.JSONEncoder(indent=2)
+            sections = {
+                'TEAMS_DATA': encoder.iterencode(teams_for_js),
+                'CONFIG_DATA': encoder.iterencode(self.config),
+            }
+            with open(template_path, 'r', encoding='utf-8') as f:
+                lines = self.iter_prerendered_flag(f)
+                self.write_streamed(output_path, self.iter_template(lines, sections, quoted=True))
             print(f"✓ Generated: {output_path}")
             return True
         except Exception as e:
             print(f"✗ Error generating JavaScript: {e}")
             return False
 
+    def generate_search_index(self):
+        """Generate search-index.json, the prebuilt team lookup index fetched by script.js"""
+        output_path = self.output_dir / 'search-index.json'
+        try:
+            with metrics.timer('build_search_index'):
+                index = self.build_search_index()
+            encoder = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False)
+            self.write_streamed(output_path, encoder.iterencode(index))
+            print(f"✓ Generated: {output_path}")
+            return True
+        except Exception as e:
+            print(f"✗ Error generating search index: {e}")
+            return False
+
+    def generate_service_worker(self):
+        """Generate sw.js with a precache manifest of this build's files and their content hashes"""
+        template_path = self.templates_dir / 'sw.js'
+        output_path = self.output_dir / 'sw.js'
+        settings = self.service_worker_settings()
+        if not (self.service_worker and settings['enabled']):
+            return True
+        try:
+            with metrics.timer('build_sw_manifest'):
+                revisions = self.build_sw_revisions()
+            precache = [p for p in ('' if f == 'index.html' else f for f in SW_PRECACHE) if p in revisions]
+            if settings['precache_images']:
+                precache += [p for p in revisions if Path(p).suffix.lower() in SW_IMAGE_SUFFIXES]
+            version = hashlib.sha256(json.dumps(revisions, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+            sections = {
+                'SW_VERSION': json.dumps(version),
+                'SW_REVISIONS': json.dumps(revisions, indent=2, ensure_ascii=False),
+                'SW_PRECACHE': json.dumps(precache, indent=2, ensure_ascii=False),
+            }
+            with open(template_path, 'r', encoding='utf-8') as f:
+                self.write_streamed(output_path, self.iter_template(f, sections, quoted=True))
+            metrics.inc('sw_manifest_entries', len(revisions))
+            print(f"✓ Generated: {output_path} (build {version}, {len(revisions)} files, {len(precache)} precached)")
+            return True
+        except Exception as e:
+            print(f"✗ Error generating service worker: {e}")
+            return False
+
+    def service_worker_settings(self):
+        """config.yaml's `service_worker:` block (or a bare true/false) merged over the defaults."""
+        value = self.config.get('service_worker', True)
+        settings = {'enabled': True, 'precache_images': False}
+        if isinstance(value, dict):
+            settings.update(value)
+        else:
+            settings['enabled'] = bool(value)
+        return settings
+
+    def build_sw_revisions(self):
+        """Map each output file (scope-relative URL path, '' for index.html) to a short content hash."""
+        revisions = {}
+        for path in sorted(self.output_dir.rglob('*')):
+            if not path.is_file() or path.name in SW_SKIP_NAMES or path.suffix in SW_SKIP_SUFFIXES:
+                continue
+            rel = path.relative_to(self.output_dir).as_posix()
+            with open(path, 'rb') as f:
+                digest = hashlib.file_digest(f, 'sha256').hexdigest()[:16]
+            revisions['' if rel == 'index.html' else rel] = digest
+        return revisions
+
+    @staticmethod
+    def iter_prerendered_flag(lines):
+        """Pass script.js lines through, declaring RESULTS_PRERENDERED ahead of the config."""
+        for line in lines:
+            stripped = line.lstrip()
+            if stripped.startswith('const CONFIG_DATA_PLACEHOLDER ='):
+                # Flag to tell frontend results are pre-rendered
+                yield f"{line[:len(line) - len(stripped)]}const RESULTS_PRERENDERED = true;\n"
+            yield line
+
+    # ----------------- Streaming Writer Helpers -----------------
+    @staticmethod
+    def iter_template(lines, sections, quoted=False):
+        """Yield template lines with {{PLACEHOLDER}} markers expanded from `sections`.
+
+        Values may be plain strings or iterables of string chunks; chunks are yielded
+        as-is so callers can pipe them to a file without joining. Unknown markers are
+        left untouched. With quoted=True only markers wrapped in single quotes match
+        and the quotes are replaced along with them (used for JS literals).
+        """
+        pattern = QUOTED_PLACEHOLDER_RE if quoted else PLACEHOLDER_RE
+        for line in lines:
+            pos = 0
+            for m in pattern.finditer(line):
+                name = m.group(1)
+                if name not in sections:
+                    continue
+                yield line[pos:m.start()]
+                value = sections[name]
+                if isinstance(value, str):
+                    yield value
+                else:
+                    yield from value
+                pos = m.end()
+            yield line[pos:]
+
+    @staticmethod
+    def write_streamed(output_path, chunks):
+        """Write an iterable of string chunks to output_path via a temp file and atomic rename."""
+        tmp_path = Path(f"{output_path}.tmp")
+        try:
+            timer_name = 'render_' + re.sub(r'\W', '_', Path(output_path).name)
+            with metrics.timer(timer_name):
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.writelines(chunks)
+            metrics.inc('bytes_rendered', tmp_path.stat().st_size)
+            os.replace(tmp_path, output_path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
 
     def generate_all(self):
-        """Generate the complete website"""
+        """Generate the complete website. Returns True on success."""
         print("=" * 60)
         print("🎨 PHOTOGRAPHY CONTEST GALLERY GENERATOR")
         print("=" * 60)
         
         if not self.load_data():
-            return
+            return False
 
 
-        self.setup_output()
+        with metrics.timer('setup_output'):
+            self.setup_output()
         
         # --- Start of new code ---
         # Copy 'public' directory to 'dist' if it exists
@@ -170,7 +316,10 @@ class GalleryGenerator:
         if public_dir.exists() and public_dir.is_dir():
             destination = self.output_dir
             try:
-                shutil.copytree(public_dir, destination, dirs_exist_ok=True)
+                # Hardlinked, so dist costs no extra disk and deduplicated images stay shared.
+                # Safe because dist is rebuilt from scratch and every output below replaces its file.
+                with metrics.timer('copy_public'):
+                    shutil.copytree(public_dir, destination, dirs_exist_ok=True, copy_function=link_or_copy)
                 print(f"✓ Copied '{public_dir}' to '{destination}'")
             except Exception as e:
                 print(f"✗ Error copying public directory: {e}")
@@ -179,7 +328,10 @@ class GalleryGenerator:
         success = all([
             self.generate_html(),
             self.generate_css(),
-            self.generate_js()
+            self.generate_js(),
+            self.generate_search_index(),
+            # Last: its manifest hashes the other outputs
+            self.generate_service_worker()
         ])
 
 
@@ -191,12 +343,26 @@ class GalleryGenerator:
             print("=" * 60)
         else:
             print("\n✗ Generation failed!")
+        return success
 
     # ----------------- Server-Side Results Helpers -----------------
+    MEDALS = ['🥇','🥈','🥉']
+    RESULTS_PLACEHOLDERS = ('WINNERS_LIST_HTML', 'WINNER_GALLERY_HTML', 'PUBLIC_VOTE_CHART_SVG', 'PUBLIC_VOTE_LEGEND_HTML', 'EXTRA_STATS_HTML', 'WINNER_PRELOAD_LINKS')
+
     def build_results_fragments(self):
         """Return tuple of (winners_html, winner_gallery_html, public_vote_svg, public_vote_legend_html, extra_stats_html, winner_preloads)."""
+        sections = self.results_sections()
+        return tuple(''.join(sections[k]) for k in self.RESULTS_PLACEHOLDERS)
+
+    def results_sections(self):
+        """Map index.html results placeholders to lazy fragment generators.
+
+        Nothing is rendered until a generator is consumed, and each one yields a
+        single card/circle/legend item at a time, so streaming them to disk keeps
+        peak memory independent of the number of teams.
+        """
         if not self.teams_data:
-            return ('','','','','','')
+            return {k: '' for k in self.RESULTS_PLACEHOLDERS}
         # Determine if names should be hidden in results modal based on config
         hide_names = self.should_hide_names_server('results')
 
@@ -206,45 +372,57 @@ class GalleryGenerator:
                 return f"Submission #{r}"
             return team.get('teamName') or team.get('team_name') or 'Team'
 
-        # Winners: sort by rank ascending
-        sorted_by_rank = sorted(self.teams_data, key=lambda t: self.safe_float(t.get('rank'), 9999))
-        winners = sorted_by_rank[:3]
-        winners_fragments = []
-        medals = ['🥇','🥈','🥉']
-        for i,team in enumerate(winners):
+        return {
+            'WINNERS_LIST_HTML': self.iter_winners(disp),
+            'WINNER_GALLERY_HTML': self.iter_winner_gallery(disp),
+            'PUBLIC_VOTE_CHART_SVG': self.iter_public_vote_chart(disp),
+            'PUBLIC_VOTE_LEGEND_HTML': self.iter_public_vote_legend(disp),
+            'EXTRA_STATS_HTML': self.iter_extra_stats_server(hide_names),
+            'WINNER_PRELOAD_LINKS': self.iter_winner_preloads(),
+        }
+
+    def top_winners(self):
+        """Top 3 teams by rank ascending (stable, like a full sort) without sorting everything."""
+        return heapq.nsmallest(3, self.teams_data, key=lambda t: self.safe_float(t.get('rank'), 9999))
+
+    def iter_winners(self, disp):
+        for i,team in enumerate(self.top_winners()):
             img = (team.get('images') or [''])[0]
             percent = team.get('public_vote_percent')
             percent_html = f"<span class=\"text-xs block mt-1 opacity-70\">{percent}% public vote</span>" if percent is not None else ''
-            winners_fragments.append(
+            yield (
                 f"<div class=\"winner-card mono-border p-4 flex flex-col gap-3\">"
                 f"<div class=\"aspect-square overflow-hidden border border-black/20\"><img loading=\"lazy\" src=\"{img}\" alt=\"{disp(team)}\" class=\"object-cover w-full h-full\" /></div>"
-                f"<div><h4 class=\"font-bold tracking-wide text-sm\">{medals[i]} {disp(team)}</h4>{percent_html}</div>"
+                f"<div><h4 class=\"font-bold tracking-wide text-sm\">{self.MEDALS[i]} {disp(team)}</h4>{percent_html}</div>"
                 f"</div>"
             )
-        winners_html = ''.join(winners_fragments)
 
-        # Preload <link> tags for top winner images (improves perceived modal open)
-        winner_preloads = []
-        for team in winners:
+    def iter_winner_preloads(self):
+        """Preload <link> tags for top winner images (improves perceived modal open)"""
+        first = True
+        for team in self.top_winners():
             img = (team.get('images') or [''])[0]
             if not img:
                 continue
             as_attr = 'image'
-            winner_preloads.append(f'<link rel="preload" href="{img}" as="{as_attr}" imagesrcset="{img}" />')
-        winner_preloads_html = '\n    '.join(winner_preloads)
+            if not first:
+                yield '\n    '
+            first = False
+            yield f'<link rel="preload" href="{img}" as="{as_attr}" imagesrcset="{img}" />'
 
-        # Winner gallery: order by public vote desc then rank asc
+    def iter_winner_gallery(self, disp):
+        """Winner gallery: order by public vote desc then rank asc"""
         def vote_key(t):
             pv = t.get('public_vote_percent')
             return -pv if isinstance(pv,(int,float)) else 999999
+        # Sorting only reorders references to the already-loaded team dicts.
         sorted_by_vote = sorted(self.teams_data, key=lambda t: (vote_key(t), self.safe_float(t.get('rank'),9999)))
-        gallery_parts = []
         for idx,team in enumerate(sorted_by_vote):
-            medal = medals[idx] if idx < 3 else ''
+            medal = self.MEDALS[idx] if idx < 3 else ''
             img = (team.get('images') or [''])[0]
             pv = team.get('public_vote_percent')
             pv_html = f"{pv}% vote" if pv is not None else ''
-            gallery_parts.append(
+            yield (
                 f"<div class=\"winner-gallery-card flex flex-col border border-black/30 bg-white hover:shadow-md transition-shadow\">"
                 f"<div class=\"h-40 overflow-hidden\"><img loading=\"lazy\" src=\"{img}\" alt=\"{disp(team)}\" class=\"object-cover w-full h-full\" /></div>"
                 f"<div class=\"p-3 flex flex-col flex-grow\">"
@@ -252,48 +430,54 @@ class GalleryGenerator:
                 f"<div class=\"text-[10px] opacity-70 mt-auto\">{pv_html}</div>"
                 f"</div></div>"
             )
-        winner_gallery_html = ''.join(gallery_parts)
 
-        # Public vote chart (SVG concentric dash circles)
+    def iter_public_vote_slices(self):
+        """Yield (index, team, value, fraction, cumulative) for the public vote pie, largest first."""
         vote_data = [t for t in self.teams_data if isinstance(t.get('public_vote_percent'), (int,float))]
-        public_vote_svg = ''
-        public_vote_legend = ''
-        if vote_data:
-            vote_data_sorted = sorted(vote_data, key=lambda t: -t.get('public_vote_percent'))
-            total = sum(t.get('public_vote_percent') for t in vote_data_sorted) or 1
-            size = 260
-            radius = size/2
-            circ = 3.141592653589793 * 2 * radius
-            cumulative = 0.0
-            circles = []
-            legend_items = []
-            for i,t in enumerate(vote_data_sorted):
-                val = t.get('public_vote_percent')
-                frac = val / total
-                dash = frac * circ
-                gap = circ - dash
-                label = disp(t)
-                circles.append(f"<circle r=\"{radius}\" cx=\"{radius}\" cy=\"{radius}\" fill=\"transparent\" stroke=\"hsl(0,0%,{15+i*8}%)\" stroke-width=\"{radius}\" stroke-dasharray=\"{dash} {gap}\" stroke-dashoffset=\"{-cumulative * circ}\" data-label=\"{label}\"></circle>")
-                legend_items.append(f"<div class=\"flex items-center gap-1\"><span class=\"inline-block w-3 h-3\" style=\"background:hsl(0,0%,{15+i*8}%);\"></span><span class=\"text-[10px] uppercase tracking-wide\">{label} – {val}%</span></div>")
-                cumulative += frac
-            public_vote_svg = f"<svg viewBox=\"0 0 {size} {size}\" class=\"mono-pie\">{''.join(circles)}</svg>"
-            public_vote_legend = ''.join(legend_items)
-
-        # Extra stats
-        extra_stats_html = self.render_extra_stats_server(hide_names)
-        return winners_html, winner_gallery_html, public_vote_svg, public_vote_legend, extra_stats_html, winner_preloads_html
+        if not vote_data:
+            return
+        vote_data.sort(key=lambda t: -t.get('public_vote_percent'))
+        total = sum(t.get('public_vote_percent') for t in vote_data) or 1
+        cumulative = 0.0
+        for i,t in enumerate(vote_data):
+            val = t.get('public_vote_percent')
+            frac = val / total
+            yield i, t, val, frac, cumulative
+            cumulative += frac
+
+    def iter_public_vote_chart(self, disp):
+        """Public vote chart (SVG concentric dash circles)"""
+        size = 260
+        radius = size/2
+        circ = 3.141592653589793 * 2 * radius
+        opened = False
+        for i, t, val, frac, cumulative in self.iter_public_vote_slices():
+            if not opened:
+                yield f"<svg viewBox=\"0 0 {size} {size}\" class=\"mono-pie\">"
+                opened = True
+            dash = frac * circ
+            gap = circ - dash
+            yield f"<circle r=\"{radius}\" cx=\"{radius}\" cy=\"{radius}\" fill=\"transparent\" stroke=\"hsl(0,0%,{15+i*8}%)\" stroke-width=\"{radius}\" stroke-dasharray=\"{dash} {gap}\" stroke-dashoffset=\"{-cumulative * circ}\" data-label=\"{disp(t)}\"></circle>"
+        if opened:
+            yield "</svg>"
+
+    def iter_public_vote_legend(self, disp):
+        for i, t, val, frac, cumulative in self.iter_public_vote_slices():
+            yield f"<div class=\"flex items-center gap-1\"><span class=\"inline-block w-3 h-3\" style=\"background:hsl(0,0%,{15+i*8}%);\"></span><span class=\"text-[10px] uppercase tracking-wide\">{disp(t)} – {val}%</span></div>"
 
     def render_extra_stats_server(self, hide_names):
+        return ''.join(self.iter_extra_stats_server(hide_names))
+
+    def iter_extra_stats_server(self, hide_names):
         stats = self.config.get('extra_stats') or {}
         if not stats:
-            return ''
-        parts = []
+            return
         # The logic mirrors frontend buildMiniPie / buildMiniBar
         for raw_title, obj in stats.items():
             title = raw_title.strip()
             chart = obj.get('chart')
             if 'value' in obj and obj.get('value') is not None:
-                parts.append(f"<div class=\"extra-stat-card mono-border p-4 bg-white flex flex-col\"><h4 class=\"font-bold mb-2 text-sm uppercase tracking-wide\">{title}</h4><div class=\"text-3xl font-mono\">{obj['value']}</div></div>")
+                yield f"<div class=\"extra-stat-card mono-border p-4 bg-white flex flex-col\"><h4 class=\"font-bold mb-2 text-sm uppercase tracking-wide\">{title}</h4><div class=\"text-3xl font-mono\">{obj['value']}</div></div>"
             elif isinstance(obj.get('data'), list) and obj['data']:
                 data = obj['data']
                 if chart == 'pie':
@@ -306,7 +490,7 @@ class GalleryGenerator:
                         circles.append(f"<circle r=\"{radius}\" cx=\"{radius}\" cy=\"{radius}\" fill=\"transparent\" stroke=\"hsl(0,0%,{20+i*10}%)\" stroke-width=\"{radius}\" stroke-dasharray=\"{dash} {gap}\" stroke-dashoffset=\"{-cumulative * circ}\"></circle>")
                         legend.append(f"<span class=\"flex items-center gap-1 text-[10px]\"><span class=\"w-2 h-2 inline-block\" style=\"background:hsl(0,0%,{20+i*10}%);\"></span>{d.get('label')}<span class=\"font-mono\">{val}</span></span>")
                         cumulative+=frac
-                    parts.append(f"<div class=\"extra-stat-card mono-border p-4 bg-white flex flex-col\"><h4 class=\"font-bold mb-2 text-sm uppercase tracking-wide\">{title}</h4><svg viewBox=\"0 0 {size} {size}\" class=\"mini-pie\">{''.join(circles)}</svg><div class=\"flex flex-wrap gap-1 mt-2\">{''.join(legend)}</div></div>")
+                    yield f"<div class=\"extra-stat-card mono-border p-4 bg-white flex flex-col\"><h4 class=\"font-bold mb-2 text-sm uppercase tracking-wide\">{title}</h4><svg viewBox=\"0 0 {size} {size}\" class=\"mini-pie\">{''.join(circles)}</svg><div class=\"flex flex-wrap gap-1 mt-2\">{''.join(legend)}</div></div>"
                 elif chart == 'bar':
                     max_val = max([d.get('value') or 0 for d in data] + [1])
                     rows=[]
@@ -314,12 +498,59 @@ class GalleryGenerator:
                         val = d.get('value') or 0
                         pct = (val/max_val)*100
                         rows.append(f"<div class=\"text-xs\"><div class=\"flex justify-between mb-1\"><span>{d.get('label')}</span><span class=\"font-mono\">{val}</span></div><div class=\"h-2 w-full bg-gray-200 relative overflow-hidden\"><div class=\"h-full\" style=\"width:{pct}%;background:hsl(0,0%,{20+i*10}%);\"></div></div></div>")
-                    parts.append(f"<div class=\"extra-stat-card mono-border p-4 bg-white flex flex-col\"><h4 class=\"font-bold mb-3 text-sm uppercase tracking-wide\">{title}</h4><div class=\"space-y-2\">{''.join(rows)}</div></div>")
+                    yield f"<div class=\"extra-stat-card mono-border p-4 bg-white flex flex-col\"><h4 class=\"font-bold mb-3 text-sm uppercase tracking-wide\">{title}</h4><div class=\"space-y-2\">{''.join(rows)}</div></div>"
                 else:
                     # Simple list fallback
                     li = [f"<li class=\"flex justify-between\"><span>{d.get('label')}</span><span class=\"font-mono\">{d.get('value')}</span></li>" for d in data]
-                    parts.append(f"<div class=\"extra-stat-card mono-border p-4 bg-white\"><h4 class=\"font-bold mb-2 text-sm uppercase tracking-wide\">{title}</h4><ul class=\"space-y-1 text-xs\">{''.join(li)}</ul></div>")
-        return ''.join(parts)
+                    yield f"<div class=\"extra-stat-card mono-border p-4 bg-white\"><h4 class=\"font-bold mb-2 text-sm uppercase tracking-wide\">{title}</h4><ul class=\"space-y-1 text-xs\">{''.join(li)}</ul></div>"
+
+    # ----------------- Client Search Index -----------------
+    SEARCH_PHASES = ('none', 'submission', 'voting', 'results')
+
+    def build_search_index(self):
+        """Build the team lookup index for script.js.
+
+        The `named` view covers teamName and team_number and is only emitted if
+        names are visible in some phase; the `anonymous` view covers what hidden
+        cards show (Submission #rank) and is only emitted if names are hidden in
+        some phase. Entry i of a view is self.teams_data[i].
+        """
+        teams = self.teams_data or []
+        hidden = [self.should_hide_names_server(p) for p in self.SEARCH_PHASES]
+        views = {}
+        if not all(hidden):
+            views['named'] = self.build_search_view(
+                f"{t.get('teamName') or t.get('team_name') or ''} {t.get('team_number') or ''}" for t in teams
+            )
+        if any(hidden):
+            # Same label the hidden cards render, so "Submission #5" finds card 5
+            views['anonymous'] = self.build_search_view(
+                f"Submission #{t.get('rank') or t.get('position') or '?'}" for t in teams
+            )
+        return {'version': 1, 'ngram': SEARCH_NGRAM, 'views': views}
+
+    @staticmethod
+    def build_search_view(texts):
+        """Normalized keys plus whole-word, n-gram and short word-prefix postings (delta-encoded)."""
+        keys, words, grams, prefixes = [], {}, {}, {}
+        for i, text in enumerate(texts):
+            key = normalize_search_text(text)
+            keys.append(key)
+            own_words = set(key.split())
+            own_grams, own_prefixes = set(), set()
+            for word in own_words:
+                own_prefixes.update(word[:n] for n in range(1, min(len(word), SEARCH_NGRAM - 1) + 1))
+                own_grams.update(word[j:j + SEARCH_NGRAM] for j in range(len(word) - SEARCH_NGRAM + 1))
+            # i only grows, so every posting list comes out sorted
+            for table, entries in ((words, own_words), (grams, own_grams), (prefixes, own_prefixes)):
+                for entry in entries:
+                    table.setdefault(entry, []).append(i)
+        return {
+            'keys': keys,
+            'words': {w: delta_encode(v) for w, v in words.items()},
+            'grams': {g: delta_encode(v) for g, v in grams.items()},
+            'prefixes': {p: delta_encode(v) for p, v in prefixes.items()},
+        }
 
     def should_hide_names_server(self, phase):
         cfg = self.config or {}
@@ -350,7 +581,9 @@ class GalleryGenerator:
 
 def main():
     generator = GalleryGenerator()
-    generator.generate_all()
+    with metrics.timer('generate_site'):
+        generator.generate_all()
+    metrics.write_report('generate_site')
 
 
 if __name__ == '__main__':
@@ -5,6 +5,8 @@ import re
 import yaml
 from datetime import datetime
 
+import metrics
+
 
 def generate_teams_yaml(csv_path='data.csv', yaml_path='teams.yaml'):
     """
@@ -66,8 +68,9 @@ def generate_teams_yaml(csv_path='data.csv', yaml_path='teams.yaml'):
             return
 
     # --- Read raw rows first (preserve duplicate headers) ---
-    with open(csv_path, mode='r', encoding='utf-8') as infile:
+    with metrics.timer('read_csv'), open(csv_path, mode='r', encoding='utf-8') as infile:
         reader_raw = list(csv.reader(infile))
+    metrics.inc('bytes_read', os.path.getsize(csv_path))
     if not reader_raw:
         print("CSV empty")
         return
@@ -104,6 +107,7 @@ def generate_teams_yaml(csv_path='data.csv', yaml_path='teams.yaml'):
         extra_stat_columns[title]['idxs'][group].append(idx)
 
     for i, row in enumerate(data_rows):
+        metrics.inc('rows_parsed')
         if not row or all((c is None or str(c).strip()=='' for c in row)):
             continue
         team_name = (row[idx_team_name] if idx_team_name is not None and idx_team_name < len(row) else '').strip()
@@ -137,6 +141,7 @@ def generate_teams_yaml(csv_path='data.csv', yaml_path='teams.yaml'):
             "public_vote_percent": public_vote_percent
         }
         teams.append(team_data)
+        metrics.inc('teams_emitted')
 
         # Collect extra stats per row
         for title, meta in extra_stat_columns.items():
@@ -208,15 +213,18 @@ def generate_teams_yaml(csv_path='data.csv', yaml_path='teams.yaml'):
                                 extra_stats[title]['value'] = val_raw
                             break
 
-    with open(yaml_path, 'w', encoding='utf-8') as outfile:
+    with metrics.timer('write_yaml'), open(yaml_path, 'w', encoding='utf-8') as outfile:
         out_obj = {"teams": teams}
         if extra_stats:
             out_obj['extra_stats'] = extra_stats
         yaml.dump(out_obj, outfile, default_flow_style=False, sort_keys=False)
+    metrics.inc('bytes_written', os.path.getsize(yaml_path))
 
     print(f"Successfully generated {yaml_path} with {len(teams)} teams and {len(extra_stats)} extra stats groups.")
 
 
 if __name__ == "__main__":
-    generate_teams_yaml()
+    with metrics.timer('generate_teams'):
+        generate_teams_yaml()
+    metrics.write_report('generate_teams')
 
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Content-addressed image store shared between builds (see batch.py).
+
+Layout under the cache root:
+
+    ids/<drive file id>                      -> "<sha256> <ext>" of the file it served
+    sources/<ab>/<sha256><ext>               -> downloaded submission bytes
+    encoded/<settings>/<ab>/<sha256>.avif    -> AVIF produced from that source
+
+`settings` is AvifPolicy.output_key(), so changing quality or size limits
+re-encodes instead of reusing outputs made with other settings.
+
+Only ids/ is not content-addressed: a participant can replace the file behind
+a Drive ID ("Manage versions"). ID entries are therefore trusted for
+`id_max_age_hours` (config.yaml `image_cache:` block) after the download that
+wrote them; older ones are fetched again, and unchanged bytes still hit the
+encoded store. Entries are
+written to a temp file and renamed, so parallel workers (or events) sharing
+one cache never see partial files; outputs are hardlinked out of the store.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import metrics
+from dedupe import link_or_copy
+
+
+DEFAULTS = {
+    'id_max_age_hours': 1,  # reuse a Drive ID's last download for this long; 0 = always download, null = forever
+}
+
+
+class ImageCache:
+    def __init__(self, root, settings_key, **settings):
+        unknown = set(settings) - set(DEFAULTS)
+        if unknown:
+            raise ValueError(f"Unknown image_cache setting(s): {', '.join(sorted(unknown))}")
+        self.root = Path(root)
+        self.settings_key = settings_key
+        self.settings = {**DEFAULTS, **settings}
+
+    @classmethod
+    def from_config(cls, root, settings_key, config):
+        """Build a cache from a parsed config.yaml dict (its optional `image_cache:` block)."""
+        return cls(root, settings_key, **((config or {}).get('image_cache') or {}))
+
+    # ---------------- paths ----------------
+    def _id_path(self, file_id):
+        return self.root / 'ids' / file_id
+
+    def _source_path(self, digest, ext):
+        return self.root / 'sources' / digest[:2] / f'{digest}{ext}'
+
+    def _encoded_path(self, digest):
+        return self.root / 'encoded' / self.settings_key / digest[:2] / f'{digest}.avif'
+
+    def _store(self, src, dst, text=None, replace=False):
+        """Atomically place a hardlink/copy of src (or the given text) at dst; first writer wins unless replace."""
+        if dst.exists() and not replace:
+            return
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=dst.parent, prefix='.tmp-')
+        os.close(fd)
+        try:
+            if text is not None:
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    f.write(text)
+            else:
+                os.remove(tmp)
+                try:
+                    os.link(src, tmp)
+                except OSError:
+                    shutil.copy2(src, tmp)
+            os.replace(tmp, dst)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    # ---------------- lookups ----------------
+    def lookup_id(self, file_id):
+        """(digest, ext) of what this Drive file ID served within id_max_age_hours, or None."""
+        max_age = self.settings['id_max_age_hours']
+        if max_age is not None and max_age <= 0:
+            return None
+        path = self._id_path(file_id)
+        try:
+            if max_age is not None and time.time() - path.stat().st_mtime > max_age * 3600:
+                metrics.inc('cache_ids_expired')
+                return None
+            digest, ext = path.read_text(encoding='utf-8').split()
+            return digest, ext
+        except (OSError, ValueError):
+            return None
+
+    def link_encoded(self, digest, output_base):
+        """Link the cached AVIF for digest to output_base (.avif). Returns the path or None on a miss."""
+        cached = self._encoded_path(digest)
+        if not cached.exists():
+            metrics.inc('cache_encoded_misses')
+            return None
+        dst = os.path.splitext(output_base)[0] + '.avif'
+        link_or_copy(cached, dst)
+        metrics.inc('cache_encoded_hits')
+        return dst
+
+    def link_source(self, digest, ext, output_base):
+        """Link the cached download for digest to output_base + ext. Returns the path or None on a miss."""
+        cached = self._source_path(digest, ext)
+        if not cached.exists():
+            return None
+        dst = os.path.splitext(output_base)[0] + ext
+        link_or_copy(cached, dst)
+        metrics.inc('cache_source_hits')
+        return dst
+
+    # ---------------- inserts ----------------
+    def put_source(self, file_id, digest, ext, path):
+        self._store(path, self._source_path(digest, ext))
+        # Rewritten on every download: refreshes its age and follows replaced files
+        self._store(None, self._id_path(file_id), text=f'{digest} {ext}\n', replace=True)
+
+    def put_encoded(self, digest, path):
+        self._store(path, self._encoded_path(digest))
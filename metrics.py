@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Lightweight run metrics for the build pipeline.
+
+Scripts time stages with `timer`, bump counters with `inc` and call
+`write_report` once at the end. Each timed block is also recorded in a
+latency histogram, so per-file work (one download, one encode) shows up as
+a distribution rather than a single total.
+
+Reports go to metrics/<run>.json, the latest run, and are appended as one
+line to metrics/<run>.jsonl, the history used to spot regressions between
+runs (override the directory with METRICS_DIR, set it to an empty string to
+disable). Set METRICS_PROM_DIR to also write a
+Prometheus textfile (mono_gallery_<run>.prom) for node_exporter's textfile
+collector.
+"""
+
+import json
+import os
+import re
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+# Latency buckets in seconds (upper bounds), Prometheus-style; +Inf is implicit.
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+PROM_PREFIX = 'mono_gallery'
+# Characters not allowed in Prometheus metric names.
+PROM_INVALID_RE = re.compile(r'[^a-zA-Z0-9_:]')
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.bucket_counts[i] += 1
+                break
+
+    def cumulative(self):
+        """Yield (upper_bound, cumulative_count) pairs, ending with +Inf."""
+        running = 0
+        for bound, n in zip(self.buckets, self.bucket_counts):
+            running += n
+            yield bound, running
+        yield float('inf'), self.count
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'sum_seconds': round(self.sum, 6),
+            'min_seconds': None if self.min is None else round(self.min, 6),
+            'max_seconds': None if self.max is None else round(self.max, 6),
+            'buckets': {('+Inf' if b == float('inf') else str(b)): c for b, c in self.cumulative()},
+        }
+
+
+_started = time.time()
+_counters = {}
+_histograms = {}
+
+
+def reset():
+    """Clear all recorded values (used when one process builds several runs)."""
+    global _started
+    _started = time.time()
+    _counters.clear()
+    _histograms.clear()
+
+
+def inc(name, value=1):
+    """Add value to counter `name` (e.g. bytes_downloaded, rows_parsed)."""
+    _counters[name] = _counters.get(name, 0) + value
+
+
+def observe(name, seconds):
+    """Record one latency sample in histogram `name`."""
+    hist = _histograms.get(name)
+    if hist is None:
+        hist = _histograms[name] = Histogram()
+    hist.observe(seconds)
+
+
+@contextmanager
+def timer(name):
+    """Time the enclosed block and record it in histogram `name` (seconds)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start)
+
+
+def report(run):
+    """Return the current metrics as a JSON-serialisable dict."""
+    finished = time.time()
+    return {
+        'run': run,
+        'started_at': datetime.fromtimestamp(_started, timezone.utc).isoformat(),
+        'finished_at': datetime.fromtimestamp(finished, timezone.utc).isoformat(),
+        'duration_seconds': round(finished - _started, 6),
+        'counters': dict(_counters),
+        'timings': {name: h.to_dict() for name, h in _histograms.items()},
+    }
+
+
+def prometheus_text(run):
+    """Render counters and histograms in the Prometheus text exposition format."""
+    label = f'run="{run}"'
+    lines = []
+    for name, value in sorted(_counters.items()):
+        metric = PROM_INVALID_RE.sub('_', f'{PROM_PREFIX}_{name}_total')
+        lines.append(f'# TYPE {metric} counter')
+        lines.append(f'{metric}{{{label}}} {value}')
+    for name, hist in sorted(_histograms.items()):
+        metric = PROM_INVALID_RE.sub('_', f'{PROM_PREFIX}_{name}_seconds')
+        lines.append(f'# TYPE {metric} histogram')
+        for bound, count in hist.cumulative():
+            le = '+Inf' if bound == float('inf') else str(bound)
+            lines.append(f'{metric}_bucket{{{label},le="{le}"}} {count}')
+        lines.append(f'{metric}_sum{{{label}}} {hist.sum}')
+        lines.append(f'{metric}_count{{{label}}} {hist.count}')
+    lines.append(f'# TYPE {PROM_PREFIX}_last_run_timestamp_seconds gauge')
+    lines.append(f'{PROM_PREFIX}_last_run_timestamp_seconds{{{label}}} {time.time()}')
+    return '\n'.join(lines) + '\n'
+
+
+def _write_atomic(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def _append_line(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(text + '\n')
+
+
+def write_report(run):
+    """Write metrics/<run>.json, append it to metrics/<run>.jsonl and, if METRICS_PROM_DIR is set, write a Prometheus textfile."""
+    metrics_dir = os.environ.get('METRICS_DIR', 'metrics')
+    prom_dir = os.environ.get('METRICS_PROM_DIR')
+    try:
+        if metrics_dir:
+            data = report(run)
+            path = Path(metrics_dir) / f'{run}.json'
+            _write_atomic(path, json.dumps(data, indent=2))
+            _append_line(Path(metrics_dir) / f'{run}.jsonl', json.dumps(data, separators=(',', ':')))
+            print(f"📈 Metrics: {path} (history: {run}.jsonl)")
+        if prom_dir:
+            path = Path(prom_dir) / f'{PROM_PREFIX}_{run}.prom'
+            _write_atomic(path, prometheus_text(run))
+            print(f"📈 Prometheus textfile: {path}")
+    except OSError as e:
+        print(f"⚠️ Could not write metrics report: {e}")
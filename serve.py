@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Static file server for the generated site (dist/).
+
+A drop-in replacement for `python -m http.server` that holds up on voting day:
+- threaded, HTTP/1.1 keep-alive, file bodies sent with os.sendfile (zero-copy)
+- applies the Netlify/Cloudflare-style `_headers` file
+- serves precompressed .br/.gz siblings according to Accept-Encoding
+  (gzip siblings are generated at startup for text assets; brotli too when
+  the `brotli` module is installed)
+- strong ETags with If-None-Match -> 304, If-Modified-Since, and byte Range requests
+
+Usage: python serve.py [--port 8000] [--dir dist]
+"""
+
+import argparse
+import email.utils
+import gzip
+import mimetypes
+import os
+import posixpath
+import re
+import socket
+import sys
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+PRECOMPRESS_SUFFIXES = {'.html', '.js', '.css', '.json', '.svg', '.txt', '.xml', '.webmanifest'}
+# Siblings in order of preference when the client accepts several
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+MIME_OVERRIDES = {
+    '.avif': 'image/avif',
+    '.js': 'text/javascript',
+    '.webmanifest': 'application/manifest+json',
+}
+SENDFILE_CHUNK = 4 * 1024 * 1024
+
+
+# ----------------- _headers -----------------
+def parse_headers_file(path):
+    """Parse a `_headers` file into [(compiled path regex, [(name, value), ...]), ...].
+
+    Format: an unindented URL pattern line followed by indented `Name: value`
+    lines. `*` matches anything, `:name` placeholders match one path segment.
+    """
+    rules = []
+    if not path or not Path(path).is_file():
+        return rules
+    with open(path, 'r', encoding='utf-8') as f:
+        for raw in f:
+            line = raw.rstrip('\r\n')
+            if not line.strip() or line.lstrip().startswith('#'):
+                continue
+            if not line[0].isspace():
+                pattern = re.escape(line.strip()).replace(r'\*', '.*')
+                pattern = re.sub(r'\\?:[A-Za-z_]\w*', '[^/]+', pattern)
+                rules.append((re.compile(f'^{pattern}$'), []))
+            elif rules and ':' in line:
+                name, value = line.strip().split(':', 1)
+                rules[-1][1].append((name.strip(), value.strip()))
+    return rules
+
+
+def headers_for(rules, url_path):
+    out = []
+    for pattern, headers in rules:
+        if pattern.match(url_path):
+            out.extend(headers)
+    return out
+
+
+# ----------------- precompression -----------------
+def precompress(root):
+    """Write .gz (and .br when available) siblings for text assets that lack fresh ones."""
+    written = 0
+    for path in Path(root).rglob('*'):
+        if not path.is_file() or path.suffix not in PRECOMPRESS_SUFFIXES:
+            continue
+        mtime = path.stat().st_mtime
+        data = None
+        for encoding, suffix in ENCODINGS:
+            if encoding == 'br' and brotli is None:
+                continue
+            sibling = path.with_name(path.name + suffix)
+            if sibling.exists() and sibling.stat().st_mtime >= mtime:
+                continue
+            if data is None:
+                data = path.read_bytes()
+            compressed = brotli.compress(data, quality=11) if encoding == 'br' else gzip.compress(data, 9, mtime=0)
+            if len(compressed) >= len(data):
+                continue
+            # A stale sibling may be hardlinked from public/ (see generate_site.py): replace, don't overwrite
+            sibling.unlink(missing_ok=True)
+            sibling.write_bytes(compressed)
+            written += 1
+    return written
+
+
+# ----------------- request handling -----------------
+def parse_accept_encoding(value):
+    """Return the set of content-codings the client accepts (q > 0)."""
+    accepted = set()
+    for part in (value or '').split(','):
+        token, _, params = part.strip().partition(';')
+        q = 1.0
+        m = re.search(r'q=([0-9.]+)', params)
+        if m:
+            try:
+                q = float(m.group(1))
+            except ValueError:
+                q = 0.0
+        if token and q > 0:
+            accepted.add(token.lower())
+    return accepted
+
+
+def parse_range(value, size):
+    """Parse a single `bytes=` range. Returns (start, end) inclusive, None if absent/ignored, or False if unsatisfiable."""
+    m = re.fullmatch(r'\s*bytes=(\d*)-(\d*)\s*', value or '')
+    if not m or (not m.group(1) and not m.group(2)):
+        return None  # multi-range or malformed: serve the full body
+    if not m.group(1):
+        length = int(m.group(2))
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(m.group(1))
+    end = int(m.group(2)) if m.group(2) else size - 1
+    if start >= size or end < start:
+        return False
+    return start, min(end, size - 1)
+
+
+class StaticHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'MonoGalleryServe/1.0'
+    # Headers and the sendfile body go out as separate writes; without this,
+    # Nagle + delayed ACK stall every keep-alive response by ~40 ms
+    disable_nagle_algorithm = True
+    root = Path('dist')
+    header_rules = []
+    quiet = False
+
+    def do_HEAD(self):
+        self.serve(head_only=True)
+
+    def do_GET(self):
+        self.serve(head_only=False)
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+    def translate_path(self, url_path):
+        """Map a URL path to a file under root, refusing anything that escapes it."""
+        parts = [p for p in posixpath.normpath(url_path).split('/') if p and p not in ('.', '..')]
+        return self.root.joinpath(*parts)
+
+    def send_plain(self, status, extra_headers=()):
+        body = f"{status.value} {status.phrase}\n".encode('utf-8')
+        self.send_response(status)
+        for name, value in extra_headers:
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def serve(self, head_only):
+        url_path = unquote(urlsplit(self.path).path)
+        path = self.translate_path(url_path)
+        if path.is_dir():
+            if not url_path.endswith('/'):
+                self.send_plain(HTTPStatus.MOVED_PERMANENTLY, [('Location', url_path + '/')])
+                return
+            path = path / 'index.html'
+        if not path.is_file():
+            self.send_plain(HTTPStatus.NOT_FOUND)
+            return
+
+        rule_headers = headers_for(self.header_rules, url_path)
+        ctype = MIME_OVERRIDES.get(path.suffix) or mimetypes.guess_type(path.name)[0] or 'application/octet-stream'
+        if ctype.startswith('text/') or ctype in ('application/json', 'image/svg+xml'):
+            ctype += '; charset=utf-8'
+
+        # Pick the representation: a fresh precompressed sibling if the client accepts it
+        st = path.stat()
+        file_path, encoding = path, None
+        if path.suffix in PRECOMPRESS_SUFFIXES:
+            accepted = parse_accept_encoding(self.headers.get('Accept-Encoding'))
+            for coding, suffix in ENCODINGS:
+                sibling = path.with_name(path.name + suffix)
+                if coding in accepted and sibling.is_file():
+                    sst = sibling.stat()
+                    if sst.st_mtime >= st.st_mtime:
+                        file_path, encoding, st = sibling, coding, sst
+                        break
+
+        etag = f'"{st.st_size:x}-{st.st_mtime_ns:x}{"-" + encoding if encoding else ""}"'
+        last_modified = email.utils.formatdate(st.st_mtime, usegmt=True)
+        common = [('ETag', etag), ('Last-Modified', last_modified), ('Accept-Ranges', 'bytes')]
+        if path.suffix in PRECOMPRESS_SUFFIXES:
+            common.append(('Vary', 'Accept-Encoding'))
+        common.extend(rule_headers)
+
+        if self.not_modified(etag, st.st_mtime):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            for name, value in common:
+                self.send_header(name, value)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        size = st.st_size
+        start, end = 0, size - 1
+        status = HTTPStatus.OK
+        byte_range = None
+        if encoding is None and 'Range' in self.headers:
+            if_range = self.headers.get('If-Range')
+            if not if_range or if_range.strip() == etag:
+                byte_range = parse_range(self.headers['Range'], size)
+        if byte_range is False:
+            self.send_plain(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE, [('Content-Range', f'bytes */{size}')] + common)
+            return
+        if byte_range:
+            start, end = byte_range
+            status = HTTPStatus.PARTIAL_CONTENT
+
+        try:
+            f = open(file_path, 'rb')
+        except OSError:
+            self.send_plain(HTTPStatus.NOT_FOUND)
+            return
+        with f:
+            length = end - start + 1 if size else 0
+            self.send_response(status)
+            self.send_header('Content-Type', ctype)
+            self.send_header('Content-Length', str(length))
+            if encoding:
+                self.send_header('Content-Encoding', encoding)
+            if status == HTTPStatus.PARTIAL_CONTENT:
+                self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+            for name, value in common:
+                self.send_header(name, value)
+            self.end_headers()
+            if not head_only and length:
+                self.send_body(f, start, length)
+
+    def not_modified(self, etag, mtime):
+        inm = self.headers.get('If-None-Match')
+        if inm is not None:
+            tags = [t.strip() for t in inm.split(',')]
+            return '*' in tags or etag in tags or f'W/{etag}' in tags
+        ims = self.headers.get('If-Modified-Since')
+        if ims:
+            try:
+                since = email.utils.parsedate_to_datetime(ims).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(mtime) <= since
+        return False
+
+    def send_body(self, f, offset, length):
+        """Send length bytes of f from offset, zero-copy via os.sendfile when the platform allows."""
+        if hasattr(os, 'sendfile'):
+            out_fd = self.connection.fileno()
+            try:
+                while length > 0:
+                    sent = os.sendfile(out_fd, f.fileno(), offset, min(length, SENDFILE_CHUNK))
+                    if sent == 0:
+                        break
+                    offset += sent
+                    length -= sent
+                return
+            except (BrokenPipeError, ConnectionResetError):
+                return
+            except OSError:
+                pass  # e.g. unsupported socket type: fall back to copying
+        f.seek(offset)
+        while length > 0:
+            chunk = f.read(min(length, 64 * 1024))
+            if not chunk:
+                break
+            self.wfile.write(chunk)
+            length -= len(chunk)
+
+
+class StaticServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+    def server_bind(self):
+        # Serve IPv4 and IPv6 on the same socket when bound to ::
+        if self.address_family == socket.AF_INET6:
+            self.socket.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_V6ONLY, 0)
+        super().server_bind()
+
+
+def make_server(root='dist', host='0.0.0.0', port=8000, headers_file=None, quiet=False):
+    root = Path(root).resolve()
+    if headers_file is None:
+        # Prefer the copy shipped with the build output, as static hosts do
+        headers_file = root / '_headers' if (root / '_headers').is_file() else Path('_headers')
+    handler = type('Handler', (StaticHandler,), {
+        'root': root,
+        'header_rules': parse_headers_file(headers_file),
+        'quiet': quiet,
+    })
+    server_cls = StaticServer
+    if ':' in host:
+        server_cls = type('StaticServer6', (StaticServer,), {'address_family': socket.AF_INET6})
+    return server_cls((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the generated site (dist/) for production use.')
+    parser.add_argument('--dir', '-d', default='dist', help='directory to serve (default: dist)')
+    parser.add_argument('--bind', '-b', default='0.0.0.0', help='address to bind (default: 0.0.0.0)')
+    parser.add_argument('--port', '-p', type=int, default=8000, help='port (default: 8000)')
+    parser.add_argument('--headers', default=None, help='_headers file (default: <dir>/_headers, then ./_headers)')
+    parser.add_argument('--no-precompress', action='store_true', help="don't generate .gz/.br siblings at startup")
+    parser.add_argument('--quiet', '-q', action='store_true', help='disable per-request logging')
+    args = parser.parse_args()
+
+    if not Path(args.dir).is_dir():
+        print(f"✗ Directory not found: {args.dir} (run `pixi run generate` first)")
+        sys.exit(1)
+    if not args.no_precompress:
+        written = precompress(args.dir)
+        print(f"✓ Precompressed {written} file(s){'' if brotli else ' (gzip only; install brotli for .br)'}")
+
+    server = make_server(args.dir, args.bind, args.port, args.headers, args.quiet)
+    host = 'localhost' if args.bind in ('0.0.0.0', '::') else args.bind
+    print(f"🌐 Serving {Path(args.dir).resolve()} at http://{host}:{args.port}/ (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Stopped")
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
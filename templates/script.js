@@ -3,6 +3,62 @@ document.addEventListener('DOMContentLoaded', () => {
     const TEAMS_DATA_PLACEHOLDER = '{{TEAMS_DATA}}';
     const CONFIG_DATA_PLACEHOLDER = '{{CONFIG_DATA}}';
 
+    // ----------------- Search index helpers (index built by generate_site.py) -----------------
+    // Must match normalize_search_text() in generate_site.py
+    const normalizeSearch = (text) => String(text)
+        .normalize('NFKD')
+        .replace(/\p{M}/gu, '')
+        .toLowerCase()
+        .replace(/[^\p{L}\p{N}]+/gu, ' ')
+        .trim();
+
+    // Posting lists are delta-encoded sorted team indices
+    const decodePostings = (deltas) => {
+        const out = new Array(deltas.length);
+        let prev = 0;
+        for (let i = 0; i < deltas.length; i++) {
+            prev += deltas[i];
+            out[i] = prev;
+        }
+        return out;
+    };
+
+    // Galloping intersection: cost grows with the shorter list when sizes differ a lot
+    const intersectSorted = (a, b) => {
+        if (a.length > b.length) [a, b] = [b, a];
+        const out = [];
+        let lo = 0;
+        for (let i = 0; i < a.length && lo < b.length; i++) {
+            const x = a[i];
+            let step = 1, hi = lo;
+            while (hi < b.length && b[hi] < x) { lo = hi + 1; hi += step; step *= 2; }
+            hi = Math.min(hi, b.length);
+            while (lo < hi) {
+                const mid = (lo + hi) >> 1;
+                if (b[mid] < x) lo = mid + 1; else hi = mid;
+            }
+            if (b[lo] === x) out.push(x);
+        }
+        return out;
+    };
+
+    // 3 = a whole word of key, 2 = prefix of a word, 1 = substring, 0 = no match
+    const searchMatchScore = (key, word) => {
+        let best = 0;
+        let pos = key.indexOf(word);
+        while (pos !== -1) {
+            if (pos === 0 || key[pos - 1] === ' ') {
+                const end = pos + word.length;
+                if (end === key.length || key[end] === ' ') return 3;
+                best = 2;
+            } else if (!best) {
+                best = 1;
+            }
+            pos = key.indexOf(word, pos + 1);
+        }
+        return best;
+    };
+
     class PhotoGallery {
         constructor(teams, config) {
             this.teams = teams;
@@ -15,6 +71,10 @@ document.addEventListener('DOMContentLoaded', () => {
             this.initialPan = { x: 0, y: 0 };
             this.phase = 'none';
             this.phaseReloadTimer = null;
+            this.virtual = null; // virtualized gallery state, see initVirtualGallery
+            this.searchIndex = null; // search-index.json, fetched on first focus of #teamSearch
+            this.searchIndexPromise = null;
+            this.postingCache = new Map();
 
             this.elements = {
                 galleryGrid: document.getElementById('galleryGrid'),
@@ -75,6 +135,7 @@ document.addEventListener('DOMContentLoaded', () => {
             this.phase = this.determinePhase(now);
             // Schedule a reload exactly when the next phase change boundary occurs
             this.schedulePhaseChangeReload(now);
+            this.registerServiceWorker();
             // Primary phase collapses intermediary states (pre-submission -> submission, between -> voting)
             this.primaryPhase = this.getPrimaryPhase(this.phase);
 
@@ -85,6 +146,7 @@ document.addEventListener('DOMContentLoaded', () => {
             const galleryGrid = this.elements.galleryGrid;
             const galleryHeading = document.querySelector('h3');
             const galleryInstruction = document.getElementById('galleryInstruction');
+            const searchBox = document.getElementById('teamSearchBox');
             const hrs = document.querySelectorAll('hr');
 
             // Gallery visibility logic (supports scalar or array flags incl. 'results')
@@ -95,6 +157,7 @@ document.addEventListener('DOMContentLoaded', () => {
                 if (galleryGrid) galleryGrid.style.display = 'none';
                 if (galleryHeading) galleryHeading.style.display = 'none';
                 if (galleryInstruction) galleryInstruction.style.display = 'none';
+                if (searchBox) searchBox.style.display = 'none';
                 hrs.forEach(hr => hr.style.display = 'none');
                 if (countdownSection) {
                     countdownSection.classList.add('center-content', 'section-spacing');
@@ -102,6 +165,7 @@ document.addEventListener('DOMContentLoaded', () => {
             } else {
                 this.renderGallery();
                 this.initHeroCarousel();
+                this.initSearch();
                 if (galleryInstruction) galleryInstruction.style.display = '';
             }
 
@@ -569,23 +633,340 @@ document.addEventListener('DOMContentLoaded', () => {
             }, delay);
         }
 
+        // Repeat visits paint from the generated sw.js cache; `service_worker: false` removes an installed one
+        registerServiceWorker() {
+            if (!('serviceWorker' in navigator) || !/^https?:$/.test(location.protocol)) return;
+            const sw = this.config.service_worker;
+            const enabled = !(sw === false || (sw && typeof sw === 'object' && sw.enabled === false));
+            if (enabled) {
+                // Registered after load so precaching doesn't compete with the first paint's requests
+                const register = () => navigator.serviceWorker.register('sw.js').catch(err => {
+                    console.warn('Service worker not registered:', err);
+                });
+                if (document.readyState === 'complete') register();
+                else window.addEventListener('load', register, { once: true });
+            } else {
+                navigator.serviceWorker.getRegistrations()
+                    .then(regs => regs.forEach(reg => reg.unregister()))
+                    .catch(() => {});
+            }
+        }
+
         renderGallery() {
-            this.elements.galleryGrid.innerHTML = '';
+            const grid = this.elements.galleryGrid;
+            grid.innerHTML = '';
+            // One delegated listener; cards carry their index into this.teams
+            grid.addEventListener('click', (e) => {
+                const card = e.target.closest('.team-card');
+                if (card && card.dataset.index != null) this.openModal(Number(card.dataset.index));
+            });
+            if (this.shouldVirtualizeGallery()) {
+                this.initVirtualGallery();
+                return;
+            }
+            const fragment = document.createDocumentFragment();
             this.teams.forEach((team, index) => {
-                const card = document.createElement('div');
-                card.className = 'team-card bg-white rounded-lg shadow-md border border-gray-200';
-                card.dataset.index = index;
-                card.innerHTML = `
-                    <div class="overflow-hidden h-48">
-                        <img src="${team.images[0]}" alt="${this.getDisplayName(team)}" class="w-full h-full object-cover">
-                    </div>
-                    <div class="p-4">
-                        <h3 class="font-bold text-lg truncate">${this.getDisplayName(team)}</h3>
-                    </div>
-                `;
-                card.addEventListener('click', () => this.openModal(index));
-                this.elements.galleryGrid.appendChild(card);
+                const card = this.createCard();
+                this.fillCard(card, index);
+                fragment.appendChild(card);
+            });
+            grid.appendChild(fragment);
+        }
+
+        createCard() {
+            const card = document.createElement('div');
+            card.className = 'team-card bg-white rounded-lg shadow-md border border-gray-200';
+            card.innerHTML = `
+                <div class="overflow-hidden h-48">
+                    <img alt="" class="w-full h-full object-cover" decoding="async">
+                </div>
+                <div class="p-4">
+                    <h3 class="font-bold text-lg truncate"></h3>
+                </div>
+            `;
+            return card;
+        }
+
+        fillCard(card, index) {
+            const team = this.teams[index];
+            const name = this.getDisplayName(team);
+            const img = card.querySelector('img');
+            const src = (team.images && team.images[0]) || '';
+            if (img.getAttribute('src') !== src) img.setAttribute('src', src);
+            img.alt = name;
+            card.querySelector('h3').textContent = name;
+            card.dataset.index = index;
+        }
+
+        // gallery_virtualize: true (always), false/absent (never) or a team count above which to virtualize
+        shouldVirtualizeGallery() {
+            const flag = this.config.gallery_virtualize;
+            if (typeof flag === 'number') return this.teams.length > flag;
+            return flag === true;
+        }
+
+        // Virtualized grid: only rows in (or near) the viewport exist in the DOM. Cards are
+        // absolutely positioned inside a container sized for all rows and recycled on scroll.
+        initVirtualGallery() {
+            const grid = this.elements.galleryGrid;
+            const overscan = Number.isFinite(this.config.gallery_overscan_rows) ? this.config.gallery_overscan_rows : 2;
+            this.virtual = { overscan, columns: 1, gap: 0, cardWidth: 0, rowHeight: 0, first: -1, last: -1, cards: new Map(), pool: [], frame: null };
+            grid.classList.add('virtual-grid');
+            const schedule = (remeasure) => {
+                if (remeasure) this.virtual.measured = false;
+                if (this.virtual.frame) return;
+                this.virtual.frame = requestAnimationFrame(() => {
+                    this.virtual.frame = null;
+                    this.updateVirtualGallery();
+                });
+            };
+            window.addEventListener('scroll', () => schedule(false), { passive: true });
+            window.addEventListener('resize', () => schedule(true), { passive: true });
+            this.updateVirtualGallery();
+        }
+
+        measureVirtualGallery() {
+            const grid = this.elements.galleryGrid;
+            const v = this.virtual;
+            // Let the responsive grid classes decide column count and gap, then switch back
+            grid.classList.remove('virtual-grid');
+            const style = getComputedStyle(grid);
+            v.columns = Math.max(1, style.gridTemplateColumns.split(' ').filter(Boolean).length);
+            v.gap = parseFloat(style.columnGap) || 0;
+            v.rowGap = parseFloat(style.rowGap) || v.gap;
+            grid.classList.add('virtual-grid');
+            v.cardWidth = (grid.clientWidth - v.gap * (v.columns - 1)) / v.columns;
+            // Card height depends on width only through text wrapping (names are truncated), so one sample is enough
+            const probe = v.pool.pop() || this.createCard();
+            probe.style.width = `${v.cardWidth}px`;
+            probe.style.display = '';
+            probe.style.visibility = 'hidden';
+            this.fillCard(probe, 0);
+            grid.appendChild(probe);
+            v.rowHeight = probe.offsetHeight;
+            probe.style.visibility = '';
+            grid.removeChild(probe);
+            v.pool.push(probe);
+            v.rows = Math.ceil(this.teams.length / v.columns);
+            grid.style.height = `${Math.max(0, v.rows * (v.rowHeight + v.rowGap) - v.rowGap)}px`;
+            v.first = v.last = -1;
+            v.measured = true;
+        }
+
+        updateVirtualGallery() {
+            const grid = this.elements.galleryGrid;
+            const v = this.virtual;
+            if (!this.teams.length) return;
+            if (!v.measured) {
+                this.measureVirtualGallery();
+                // Re-place every card: column width/positions changed
+                v.cards.forEach((card, index) => this.placeCard(card, index));
+            }
+            const stride = v.rowHeight + v.rowGap;
+            const top = -grid.getBoundingClientRect().top;
+            const firstRow = Math.max(0, Math.floor(top / stride) - v.overscan);
+            const lastRow = Math.min(v.rows - 1, Math.floor((top + window.innerHeight) / stride) + v.overscan);
+            const first = firstRow * v.columns;
+            const last = lastRow < firstRow ? first - 1 : Math.min(this.teams.length - 1, (lastRow + 1) * v.columns - 1);
+            if (first === v.first && last === v.last) return;
+
+            // Release cards that scrolled out, then fill the gaps from the pool
+            v.cards.forEach((card, index) => {
+                if (index < first || index > last) {
+                    v.cards.delete(index);
+                    card.style.display = 'none';
+                    v.pool.push(card);
+                }
             });
+            for (let index = first; index <= last; index++) {
+                if (v.cards.has(index)) continue;
+                let card = v.pool.pop();
+                if (!card) {
+                    card = this.createCard();
+                    grid.appendChild(card);
+                } else if (!card.parentNode) {
+                    grid.appendChild(card);
+                }
+                card.style.display = '';
+                this.fillCard(card, index);
+                this.placeCard(card, index);
+                v.cards.set(index, card);
+            }
+            v.first = first;
+            v.last = last;
+        }
+
+        placeCard(card, index) {
+            const v = this.virtual;
+            const row = Math.floor(index / v.columns);
+            const col = index % v.columns;
+            card.style.width = `${v.cardWidth}px`;
+            card.style.top = `${row * (v.rowHeight + v.rowGap)}px`;
+            card.style.left = `${col * (v.cardWidth + v.gap)}px`;
+        }
+
+        // After browsing with prev/next in the modal, bring the last viewed card into view
+        revealCard(index) {
+            const v = this.virtual;
+            if (!v || !v.measured || (index >= v.first && index <= v.last && v.cards.has(index))) return;
+            const grid = this.elements.galleryGrid;
+            const row = Math.floor(index / v.columns);
+            const y = grid.getBoundingClientRect().top + window.scrollY + row * (v.rowHeight + v.rowGap);
+            window.scrollTo({ top: Math.max(0, y - (window.innerHeight - v.rowHeight) / 2) });
+            this.updateVirtualGallery();
+        }
+
+        // ----------------- Team search -----------------
+        initSearch() {
+            const input = document.getElementById('teamSearch');
+            const list = document.getElementById('teamSearchResults');
+            if (!input || !list) return;
+            this.elements.searchInput = input;
+            this.elements.searchResults = list;
+            let active = -1;
+            const setActive = (i) => {
+                const items = list.querySelectorAll('li[data-index]');
+                if (!items.length) return;
+                active = (i + items.length) % items.length;
+                items.forEach((li, n) => li.classList.toggle('active', n === active));
+                items[active].scrollIntoView({ block: 'nearest' });
+            };
+            const update = () => {
+                active = -1;
+                this.renderSearchResults(input.value);
+            };
+            input.addEventListener('focus', () => this.loadSearchIndex().then(update), { once: true });
+            input.addEventListener('input', update);
+            input.addEventListener('keydown', (e) => {
+                if (e.key === 'ArrowDown') { e.preventDefault(); setActive(active + 1); }
+                else if (e.key === 'ArrowUp') { e.preventDefault(); setActive(active - 1); }
+                else if (e.key === 'Escape') { input.value = ''; update(); }
+                else if (e.key === 'Enter') {
+                    const items = list.querySelectorAll('li[data-index]');
+                    const pick = items[Math.max(active, 0)];
+                    if (pick) this.openSearchResult(Number(pick.dataset.index));
+                }
+            });
+            list.addEventListener('click', (e) => {
+                const li = e.target.closest('li[data-index]');
+                if (li) this.openSearchResult(Number(li.dataset.index));
+            });
+            document.addEventListener('click', (e) => {
+                if (!e.target.closest('#teamSearchBox')) list.classList.add('hidden');
+            });
+        }
+
+        loadSearchIndex() {
+            if (!this.searchIndexPromise) {
+                this.searchIndexPromise = fetch('search-index.json')
+                    .then(res => (res.ok ? res.json() : null))
+                    .catch(() => null)
+                    .then(index => { this.searchIndex = index; return index; });
+            }
+            return this.searchIndexPromise;
+        }
+
+        // Decoded posting lists are cached per view/key; lookups never rebuild the index
+        postings(viewName, kind, key) {
+            const cacheKey = `${viewName}|${kind}|${key}`;
+            let list = this.postingCache.get(cacheKey);
+            if (!list) {
+                const deltas = this.searchIndex.views[viewName][kind][key];
+                list = deltas ? decodePostings(deltas) : [];
+                this.postingCache.set(cacheKey, list);
+            }
+            return list;
+        }
+
+        // Returns indices into this.teams: whole-word matches, then word-prefix, then substring
+        searchTeams(query, limit = 20) {
+            const index = this.searchIndex;
+            if (!index) return [];
+            const viewName = this.shouldHideTeamData() ? 'anonymous' : 'named';
+            const view = index.views[viewName];
+            if (!view) return [];
+            const words = normalizeSearch(query).split(' ').filter(Boolean);
+            if (!words.length) return [];
+            const intersectAll = (lists) => {
+                lists.sort((a, b) => a.length - b.length);
+                let out = lists[0];
+                for (let i = 1; i < lists.length && out.length; i++) out = intersectSorted(out, lists[i]);
+                return out;
+            };
+
+            const exact = intersectAll(words.map(w => this.postings(viewName, 'words', w)));
+            if (exact.length >= limit) return exact.slice(0, limit);
+
+            // Candidates: every query word's n-gram (or short-word prefix) postings
+            const n = index.ngram;
+            const lists = [];
+            for (const word of words) {
+                if (word.length < n) {
+                    lists.push(this.postings(viewName, 'prefixes', word));
+                } else {
+                    for (let i = 0; i + n <= word.length; i++) lists.push(this.postings(viewName, 'grams', word.slice(i, i + n)));
+                }
+            }
+            const candidates = intersectAll(lists);
+
+            // N-grams can match out of order, so confirm each word; rank by the weakest word's match
+            const prefixHits = [], substringHits = [];
+            const wanted = limit - exact.length;
+            for (const i of candidates) {
+                const key = view.keys[i];
+                let score = 3;
+                for (const word of words) {
+                    score = Math.min(score, searchMatchScore(key, word));
+                    if (!score) break;
+                }
+                if (score === 2) {
+                    prefixHits.push(i);
+                    if (prefixHits.length >= wanted) break;
+                } else if (score === 1 && substringHits.length < wanted) {
+                    substringHits.push(i);
+                }
+            }
+            return exact.concat(prefixHits, substringHits).slice(0, limit);
+        }
+
+        renderSearchResults(query) {
+            const list = this.elements.searchResults;
+            const trimmed = query.trim();
+            list.innerHTML = '';
+            if (!trimmed) {
+                list.classList.add('hidden');
+                return;
+            }
+            const hide = this.shouldHideTeamData();
+            const results = this.searchTeams(trimmed);
+            const fragment = document.createDocumentFragment();
+            results.forEach((index) => {
+                const team = this.teams[index];
+                const li = document.createElement('li');
+                li.dataset.index = index;
+                li.setAttribute('role', 'option');
+                li.textContent = this.getDisplayName(team);
+                if (!hide && team.team_number != null) {
+                    const meta = document.createElement('span');
+                    meta.className = 'search-meta';
+                    meta.textContent = team.team_number;
+                    li.appendChild(meta);
+                }
+                fragment.appendChild(li);
+            });
+            if (!results.length) {
+                const li = document.createElement('li');
+                li.textContent = this.searchIndex ? 'No matching teams' : 'Search is unavailable';
+                fragment.appendChild(li);
+            }
+            list.appendChild(fragment);
+            list.classList.remove('hidden');
+        }
+
+        openSearchResult(index) {
+            this.elements.searchResults.classList.add('hidden');
+            this.elements.searchInput.blur();
+            this.openModal(index);
         }
 
         openModal(index) {
@@ -602,6 +983,7 @@ document.addEventListener('DOMContentLoaded', () => {
             this.elements.modal.classList.remove('flex');
             document.body.style.overflow = '';
             this.resetPanZoom();
+            this.revealCard(this.currentTeamIndex);
             this.updateURL(true);
         }
 
@@ -899,7 +1281,8 @@ document.addEventListener('DOMContentLoaded', () => {
         initHeroCarousel() {
             if (!this.elements.heroCarousel) return;
 
-            const topTeams = this.teams
+            // Sort a copy: gallery cards and the modal index into this.teams in its original order
+            const topTeams = [...this.teams]
                 .sort((a, b) => a.rank - b.rank)
                 .slice(0, 10);
 
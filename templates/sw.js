@@ -0,0 +1,142 @@
+// Service worker for the generated gallery (written to dist/sw.js by generate_site.py).
+//
+// REVISIONS maps every file of this build (relative to the worker's scope, '' being
+// index.html) to a hash of its content, and VERSION is a hash of that map, so each
+// build gets its own cache. Installing a new build copies over every cached response
+// whose hash did not change and fetches only PRECACHE entries that did: a rebuild
+// invalidates just what changed.
+//
+// Strategies:
+//   page, script.js, style.css, search-index.json -> stale-while-revalidate
+//   images                                        -> cache-first (content-pinned by REVISIONS)
+//   CDN scripts/styles                            -> stale-while-revalidate, kept across builds
+//   anything else (not in this build)             -> network
+const VERSION = '{{SW_VERSION}}';
+const REVISIONS = '{{SW_REVISIONS}}';
+const PRECACHE = '{{SW_PRECACHE}}';
+
+const CACHE_PREFIX = 'mono-gallery-';
+const CACHE_NAME = CACHE_PREFIX + VERSION;
+const CDN_CACHE = CACHE_PREFIX + 'cdn';
+const REVISIONS_KEY = '__sw-revisions__';
+const IMAGE_RE = /\.(avif|webp|jpe?g|png|gif|svg|ico|bmp|tiff?|heic|heif)$/i;
+
+const scopeUrl = path => new URL(path, self.registration.scope).href;
+
+// Path of a same-origin URL relative to the scope ('' for the page itself), or null outside it.
+function relativePath(href) {
+    const url = new URL(href);
+    const scope = self.registration.scope;
+    const bare = url.origin + url.pathname;
+    if (!bare.startsWith(scope)) return null;
+    const path = decodeURIComponent(bare.slice(scope.length));
+    return path === 'index.html' ? '' : path;
+}
+
+// Responses that went through a redirect can't answer navigations; store a plain copy.
+async function storable(response) {
+    if (!response.redirected) return response;
+    return new Response(await response.blob(), {
+        status: response.status,
+        statusText: response.statusText,
+        headers: response.headers,
+    });
+}
+
+async function previousBuild() {
+    const names = (await caches.keys()).filter(n => n.startsWith(CACHE_PREFIX) && n !== CACHE_NAME && n !== CDN_CACHE);
+    // Newest first: the most recently created cache belongs to the build being replaced
+    for (const name of names.reverse()) {
+        const cache = await caches.open(name);
+        const stored = await cache.match(scopeUrl(REVISIONS_KEY));
+        if (stored) return { cache, revisions: await stored.json() };
+    }
+    return null;
+}
+
+async function install() {
+    const cache = await caches.open(CACHE_NAME);
+    const previous = await previousBuild();
+    if (previous) {
+        const requests = await previous.cache.keys();
+        await Promise.all(requests.map(async request => {
+            const path = relativePath(request.url);
+            if (path === null || !(path in REVISIONS) || REVISIONS[path] !== previous.revisions[path]) return;
+            const response = await previous.cache.match(request);
+            if (response) await cache.put(scopeUrl(path), response);
+        }));
+    }
+    await Promise.all(PRECACHE.map(async path => {
+        const url = scopeUrl(path);
+        if (await cache.match(url)) return;
+        const response = await fetch(url, { cache: 'no-cache' });
+        if (!response.ok) throw new Error(`Precaching ${url} failed: HTTP ${response.status}`);
+        await cache.put(url, await storable(response));
+    }));
+    await cache.put(scopeUrl(REVISIONS_KEY), new Response(JSON.stringify(REVISIONS), {
+        headers: { 'Content-Type': 'application/json' },
+    }));
+}
+
+self.addEventListener('install', event => {
+    event.waitUntil(install().then(() => self.skipWaiting()));
+});
+
+self.addEventListener('activate', event => {
+    event.waitUntil((async () => {
+        const names = await caches.keys();
+        await Promise.all(names
+            .filter(n => n.startsWith(CACHE_PREFIX) && n !== CACHE_NAME && n !== CDN_CACHE)
+            .map(n => caches.delete(n)));
+        await self.clients.claim();
+    })());
+});
+
+async function staleWhileRevalidate(event, cacheName, key, networkRequest) {
+    const cache = await caches.open(cacheName);
+    const cached = await cache.match(key);
+    const network = fetch(networkRequest).then(async response => {
+        // Opaque responses (no-cors CDN scripts) can't be inspected but are still usable
+        if (response.ok || response.type === 'opaque') {
+            await cache.put(key, await storable(response.clone()));
+        }
+        return response;
+    });
+    if (cached) {
+        event.waitUntil(network.catch(() => {}));
+        return cached;
+    }
+    return network;
+}
+
+async function cacheFirst(event, key) {
+    const cache = await caches.open(CACHE_NAME);
+    const cached = await cache.match(key);
+    if (cached) return cached;
+    const response = await fetch(key);
+    if (response.ok) event.waitUntil(cache.put(key, response.clone()));
+    return response;
+}
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    if (request.method !== 'GET' || request.headers.has('Range')) return;
+
+    const url = new URL(request.url);
+    if (url.origin !== self.location.origin) {
+        if (request.destination === 'script' || request.destination === 'style') {
+            event.respondWith(staleWhileRevalidate(event, CDN_CACHE, request, request));
+        }
+        return;
+    }
+
+    const path = relativePath(request.url);
+    if (path === null || !(path in REVISIONS)) return;
+    const key = scopeUrl(path);
+    if (IMAGE_RE.test(path)) {
+        event.respondWith(cacheFirst(event, key));
+    } else {
+        // Query strings (?team=12 share links) all map to the one cached copy
+        event.respondWith(staleWhileRevalidate(event, CACHE_NAME, key, new Request(key, { cache: 'no-cache' })));
+    }
+});
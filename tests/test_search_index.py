@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Checks for the prebuilt search index (dist/search-index.json).
+
+`search()` follows the whole-word step of searchTeams() in script.js: the
+query is normalized, split into words, and the words' posting lists are
+intersected. Run with `pixi run test`.
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate_site import GalleryGenerator, normalize_search_text  # noqa: E402
+
+
+def decode(deltas):
+    out, prev = [], 0
+    for d in deltas:
+        prev += d
+        out.append(prev)
+    return out
+
+
+def search(index, view_name, query):
+    view = index['views'][view_name]
+    result = None
+    for word in normalize_search_text(query).split():
+        hits = set(decode(view['words'].get(word, [])))
+        result = hits if result is None else result & hits
+    return sorted(result or [])
+
+
+def generator(show_team_data):
+    gen = GalleryGenerator()
+    gen.config = {'show_team_data': show_team_data}
+    gen.teams_data = [
+        {'teamName': 'Café Racers', 'team_number': '21', 'rank': 2},
+        {'teamName': 'Night Owls', 'team_number': '214', 'rank': 1},
+        {'teamName': 'Pixel Pushers', 'team_number': '7', 'rank': 5},
+    ]
+    return gen
+
+
+class SearchIndexTest(unittest.TestCase):
+    def test_anonymous_view_matches_rendered_label(self):
+        index = generator('none').build_search_index()
+        self.assertNotIn('named', index['views'])
+        self.assertEqual(search(index, 'anonymous', 'Submission #5'), [2])
+        self.assertEqual(search(index, 'anonymous', 'submission 1'), [1])
+        self.assertEqual(search(index, 'anonymous', 'submission'), [0, 1, 2])
+
+    def test_anonymous_view_hides_names(self):
+        index = generator('none').build_search_index()
+        self.assertEqual(search(index, 'anonymous', 'Night Owls'), [])
+        self.assertEqual(search(index, 'anonymous', '214'), [])
+
+    def test_named_view(self):
+        index = generator('all').build_search_index()
+        self.assertNotIn('anonymous', index['views'])
+        self.assertEqual(search(index, 'named', 'cafe'), [0])
+        self.assertEqual(search(index, 'named', '214'), [1])
+
+
+if __name__ == '__main__':
+    unittest.main()
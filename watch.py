@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Watch mode for local development (`pixi run quickdev`).
+
+Builds dist/ once, then keeps a GalleryGenerator resident and polls
+templates/, config.yaml, teams.yaml and data.csv. A change re-runs only the
+steps it affects:
+
+    templates/style.css   -> copy style.css (the browser swaps the stylesheet in place)
+    templates/index.html  -> index.html
+    templates/script.js   -> script.js
+    config.yaml           -> reload data, index.html + script.js + search-index.json
+    teams.yaml            -> reload data, index.html + script.js + search-index.json
+    data.csv              -> generate_teams.py, then as teams.yaml
+
+dist/ is served with serve.py's server; HTML responses get a small
+EventSource snippet injected so open tabs reload after each rebuild.
+Nothing is injected into the files on disk.
+
+Usage: python watch.py [--port 8000] [--no-serve]
+"""
+
+import argparse
+import threading
+import time
+from http import HTTPStatus
+from pathlib import Path
+
+import metrics
+from generate_site import GalleryGenerator
+from generate_teams import generate_teams_yaml
+from serve import make_server
+
+
+LIVERELOAD_PATH = '/__livereload'
+LIVERELOAD_SNIPPET = b"""<script>
+(function () {
+  var es = new EventSource('""" + LIVERELOAD_PATH.encode('ascii') + b"""');
+  if (navigator.serviceWorker) {
+    navigator.serviceWorker.getRegistrations().then(function (regs) {
+      regs.forEach(function (reg) { reg.unregister(); });
+    });
+  }
+  es.addEventListener('reload', function () { location.reload(); });
+  es.addEventListener('css', function () {
+    document.querySelectorAll('link[rel="stylesheet"]').forEach(function (link) {
+      var url = new URL(link.href);
+      url.searchParams.set('v', Date.now());
+      link.href = url.href;
+    });
+  });
+})();
+</script>
+"""
+KEEPALIVE_SECONDS = 15
+
+# Steps in the order they must run; a change to one input schedules a subset.
+STEPS = ('teams', 'data', 'html', 'js', 'search', 'css')
+# Inputs the build itself writes (the data.csv step regenerates teams.yaml).
+GENERATED = {Path('teams.yaml')}
+
+
+def steps_for(path):
+    """Return the set of rebuild steps a change to path (relative) requires."""
+    name = path.as_posix()
+    if name == 'data.csv':
+        return {'teams', 'data', 'html', 'js', 'search'}
+    if name in ('config.yaml', 'teams.yaml'):
+        return {'data', 'html', 'js', 'search'}
+    if name == 'templates/style.css':
+        return {'css'}
+    if name == 'templates/index.html':
+        return {'html'}
+    if name == 'templates/script.js':
+        return {'js'}
+    if name.startswith('templates/'):
+        # Unknown template file (partials, assets): rebuild the pages to be safe
+        return {'html', 'js', 'css'}
+    return set()
+
+
+class Watcher:
+    """Poll mtimes/sizes of the watched inputs; stdlib only, works the same on Windows and Linux."""
+
+    def __init__(self, base_dir, files=('config.yaml', 'teams.yaml', 'data.csv'), dirs=('templates',)):
+        self.base_dir = Path(base_dir)
+        self.files = files
+        self.dirs = dirs
+        self.snapshot = self.scan()
+
+    def scan(self):
+        state = {}
+        paths = [self.base_dir / f for f in self.files]
+        for d in self.dirs:
+            root = self.base_dir / d
+            if root.is_dir():
+                paths.extend(p for p in root.rglob('*') if p.is_file())
+        for p in paths:
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            state[p.relative_to(self.base_dir)] = (st.st_mtime_ns, st.st_size)
+        return state
+
+    def changes(self):
+        """Return the relative paths that were added, modified or removed since the last call."""
+        current = self.scan()
+        changed = {p for p in current.keys() | self.snapshot.keys() if current.get(p) != self.snapshot.get(p)}
+        self.snapshot = current
+        return changed
+
+    def settle(self, changed, quiet_period):
+        """Keep collecting changes until nothing moves for quiet_period (editors save in bursts)."""
+        while True:
+            time.sleep(quiet_period)
+            more = self.changes()
+            if not more:
+                return changed
+            changed |= more
+
+
+class LiveReload:
+    """Build counter that EventSource clients block on."""
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.version = 0
+        self.event = 'reload'
+
+    def notify(self, event):
+        with self.cond:
+            self.version += 1
+            self.event = event
+            self.cond.notify_all()
+
+    def wait(self, seen, timeout):
+        with self.cond:
+            self.cond.wait_for(lambda: self.version != seen, timeout)
+            return self.version, self.event
+
+
+def make_dev_server(root, host, port, livereload):
+    server = make_server(root, host, port, quiet=True)
+    base = server.RequestHandlerClass
+
+    class DevHandler(base):
+        def do_GET(self):
+            path = self.path.split('?', 1)[0]
+            if path == LIVERELOAD_PATH:
+                self.stream_events()
+            elif path.endswith('/') or path.endswith('.html'):
+                self.send_html(path)
+            else:
+                super().do_GET()
+
+        def send_html(self, url_path):
+            file_path = self.translate_path(url_path)
+            if file_path.is_dir():
+                file_path = file_path / 'index.html'
+            if not file_path.is_file():
+                self.send_plain(HTTPStatus.NOT_FOUND)
+                return
+            body = file_path.read_bytes()
+            marker = body.rfind(b'</body>')
+            body = body[:marker] + LIVERELOAD_SNIPPET + body[marker:] if marker != -1 else body + LIVERELOAD_SNIPPET
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('Cache-Control', 'no-store')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def stream_events(self):
+            self.close_connection = True
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-store')
+            self.end_headers()
+            seen = livereload.version
+            try:
+                while True:
+                    version, event = livereload.wait(seen, KEEPALIVE_SECONDS)
+                    if version == seen:
+                        self.wfile.write(b': keepalive\n\n')
+                    else:
+                        seen = version
+                        self.wfile.write(f'event: {event}\ndata: {version}\n\n'.encode('ascii'))
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+    server.RequestHandlerClass = DevHandler
+    return server
+
+
+class DevBuilder:
+    """Resident generator that re-runs individual build steps."""
+
+    def __init__(self, generator=None):
+        self.generator = generator or GalleryGenerator()
+        # No sw.js in dev: it would serve cached pages across rebuilds (the snippet also unregisters old ones)
+        self.generator.service_worker = False
+
+    def full_build(self):
+        self.generator.generate_all()
+
+    def run(self, steps):
+        gen = self.generator
+        ok = True
+        if 'teams' in steps:
+            try:
+                generate_teams_yaml('data.csv', 'teams.yaml')
+            except Exception as e:
+                print(f"✗ Error generating teams.yaml: {e}")
+                return False
+        if 'data' in steps and not gen.load_data():
+            return False
+        if gen.teams_data is None:
+            # Nothing loaded yet (e.g. teams.yaml was missing at startup)
+            if not gen.load_data():
+                return False
+        gen.output_dir.mkdir(parents=True, exist_ok=True)
+        if 'html' in steps:
+            ok = gen.generate_html() and ok
+        if 'js' in steps:
+            ok = gen.generate_js() and ok
+        if 'search' in steps:
+            ok = gen.generate_search_index() and ok
+        if 'css' in steps:
+            ok = gen.generate_css() and ok
+        return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild dist/ incrementally on changes and live-reload the browser.')
+    parser.add_argument('--port', '-p', type=int, default=8000, help='port (default: 8000)')
+    parser.add_argument('--bind', '-b', default='127.0.0.1', help='address to bind (default: 127.0.0.1)')
+    parser.add_argument('--no-serve', action='store_true', help="only rebuild, don't serve dist/")
+    parser.add_argument('--interval', type=float, default=0.1, help='poll interval in seconds (default: 0.1)')
+    args = parser.parse_args()
+
+    builder = DevBuilder()
+    builder.full_build()
+    watcher = Watcher('.')
+    livereload = LiveReload()
+
+    server = None
+    if not args.no_serve:
+        server = make_dev_server(builder.generator.output_dir, args.bind, args.port, livereload)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"🌐 Serving {builder.generator.output_dir.resolve()} at http://localhost:{args.port}/ with live reload")
+    print("👀 Watching templates/, config.yaml, teams.yaml and data.csv (Ctrl+C to stop)")
+
+    pending = set()
+    try:
+        while True:
+            time.sleep(args.interval)
+            changed = watcher.changes() | pending
+            pending = set()
+            if not changed:
+                continue
+            changed = watcher.settle(changed, args.interval / 2)
+            steps = set().union(*(steps_for(p) for p in changed))
+            if not steps:
+                continue
+            start = time.perf_counter()
+            ok = builder.run(steps)
+            # Edits saved during the build are queued for the next round; only our own
+            # teams.yaml write (data.csv step) is dropped so it doesn't trigger a second rebuild
+            pending = watcher.changes() - (GENERATED if 'teams' in steps else set())
+            elapsed = (time.perf_counter() - start) * 1000
+            names = ', '.join(sorted(p.as_posix() for p in changed))
+            done = [s for s in STEPS if s in steps]
+            if ok:
+                print(f"🔁 {names} -> {'+'.join(done)} in {elapsed:.0f} ms")
+                livereload.notify('css' if steps == {'css'} else 'reload')
+            else:
+                print(f"✗ Rebuild after {names} failed; fix the error and save again")
+            # The generator's timers accumulate forever in a resident process
+            metrics.reset()
+    except KeyboardInterrupt:
+        print("\n👋 Stopped")
+    finally:
+        if server:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == '__main__':
+    main()